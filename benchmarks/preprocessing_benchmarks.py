@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import torch
+from torch.profiler import profile, ProfilerActivity
+from synthetic_media import make_clip
+
+try:
+    from multimodal_core.reference_preprocessing import (
+        reference_load_video_frames, reference_extract_audio_features)
+    from multimodal_core.preprocessing import tokenize_utterance
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.reference_preprocessing import (
+        reference_load_video_frames, reference_extract_audio_features)
+    from multimodal_core.preprocessing import tokenize_utterance
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KERNELS = (
+    "VideoProcessor.process_video",
+    "AudioProcessor.extract_features",
+    "MELDDataset._load_video_frames",
+    "MELDDataset._extract_audio_features",
+    "analyze_video_frames",
+    "analyze_audio",
+    "tokenize_utterance"
+)
+# Utterances in the style of MELD, short to truncated at 128 tokens
+TEXTS = [
+    "Oh my God!",
+    "You know what, I don't even care anymore.",
+    "So, uh, what's going on with you and Rachel?",
+    " ".join(["I can't believe you would do that to me after everything."] * 20)
+]
+
+
+# One function under test, called on each input. reference gives the
+# output it must match; without one the output is only checked to be the
+# same on every call. per_input reports each input (clip) separately.
+class Kernel:
+    def __init__(self, name, fn, inputs, reference=None, per_input=True):
+        self.name = name
+        self.fn = fn
+        self.inputs = inputs
+        self.reference = reference
+        self.per_input = per_input
+
+
+def deployment_kernels(fixtures):
+    sys.path.insert(0, os.path.join(ROOT_DIR, "deployment"))
+    from inference import VideoProcessor, AudioProcessor
+    # The profile the model was trained on, and the reference implements
+    video_processor = VideoProcessor("default")
+    return [
+        Kernel("VideoProcessor.process_video", video_processor.process_video,
+               fixtures, reference_load_video_frames),
+        Kernel("AudioProcessor.extract_features",
+               AudioProcessor().extract_features, fixtures,
+               reference_extract_audio_features)
+    ]
+
+
+def dataset_kernels(fixtures, media_dir):
+    sys.path.insert(0, os.path.join(ROOT_DIR, "training"))
+    from meld_dataset import MELDDataset
+
+    # A one-row split, the kernels only need the constructed dataset
+    csv_path = os.path.join(media_dir, "benchmark_meld.csv")
+    with open(csv_path, "w") as f:
+        f.write("Sr No.,Utterance,Speaker,Emotion,Sentiment,Dialogue_ID,Utterance_ID\n")
+        f.write(f'1,"{TEXTS[0]}",Monica,surprise,positive,0,0\n')
+    dataset = MELDDataset(csv_path, media_dir)
+
+    return [
+        Kernel("MELDDataset._load_video_frames", dataset._load_video_frames,
+               fixtures, reference_load_video_frames),
+        Kernel("MELDDataset._extract_audio_features",
+               dataset._extract_audio_features, fixtures,
+               reference_extract_audio_features),
+        Kernel("tokenize_utterance",
+               lambda text: tokenize_utterance(dataset.tokenizer, text), TEXTS,
+               per_input=False)
+    ]
+
+
+def backend_kernels(fixtures):
+    # The Flask backend loads its text pipelines on import and exits when
+    # a dependency is missing
+    sys.path.insert(0, ROOT_DIR)
+    try:
+        import ml_backend_enhanced
+    except (ImportError, SystemExit):
+        print("ml_backend_enhanced could not be imported, skipping "
+              "analyze_video_frames and analyze_audio")
+        return []
+    return [
+        Kernel("analyze_video_frames",
+               lambda path: ml_backend_enhanced.analyze_video_frames(path, "benchmark"),
+               fixtures),
+        Kernel("analyze_audio",
+               lambda path: ml_backend_enhanced.analyze_audio(path, "benchmark"),
+               fixtures)
+    ]
+
+
+def output_tensors(output):
+    # Tensors and arrays in a kernel output, in a fixed order
+    if isinstance(output, (torch.Tensor, np.ndarray)):
+        return [output]
+    if hasattr(output, "keys"):
+        return [tensor for key in sorted(output.keys())
+                for tensor in output_tensors(output[key])]
+    return []
+
+
+def output_bytes(output):
+    return sum(tensor.nbytes if isinstance(tensor, np.ndarray)
+               else tensor.element_size() * tensor.nelement()
+               for tensor in output_tensors(output))
+
+
+def compare_outputs(output, expected):
+    # (identical, max absolute difference); bit for bit, not approximately
+    tensors, expected_tensors = output_tensors(output), output_tensors(expected)
+    if not tensors and not expected_tensors:
+        return output == expected, None
+    if len(tensors) != len(expected_tensors):
+        return False, None
+
+    max_diff = 0.0
+    for tensor, expected_tensor in zip(tensors, expected_tensors):
+        tensor, expected_tensor = torch.as_tensor(tensor), torch.as_tensor(expected_tensor)
+        if tensor.shape != expected_tensor.shape or tensor.dtype != expected_tensor.dtype:
+            return False, None
+        if tensor.numel():
+            max_diff = max(max_diff, (tensor.double() - expected_tensor.double())
+                           .abs().max().item())
+    identical = all(torch.equal(torch.as_tensor(a), torch.as_tensor(b))
+                    for a, b in zip(tensors, expected_tensors))
+    return identical, max_diff
+
+
+def measure(fn, inputs, repeats, warmup):
+    for i in range(warmup):
+        fn(inputs[i % len(inputs)])
+
+    seconds = []
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(inputs[i % len(inputs)])
+        seconds.append(time.perf_counter() - start)
+
+    # One more call under tracing, kept out of the timings. tracemalloc
+    # sees NumPy and Python buffers, the profiler sees torch's allocator
+    # and every aten::copy_ (clone, contiguous, dtype casts).
+    tracemalloc.start()
+    with profile(activities=[ProfilerActivity.CPU], profile_memory=True) as prof:
+        output = fn(inputs[0])
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    torch_allocations = [event.self_cpu_memory_usage for event in prof.events()
+                         if event.self_cpu_memory_usage > 0]
+    milliseconds = np.asarray(seconds) * 1000
+    return output, {
+        "calls": repeats,
+        "mean_ms": round(float(milliseconds.mean()), 3),
+        "p50_ms": round(float(np.percentile(milliseconds, 50)), 3),
+        "min_ms": round(float(milliseconds.min()), 3),
+        "python_peak_mb": round(peak / 2 ** 20, 3),
+        "python_retained_mb": round(retained / 2 ** 20, 3),
+        "torch_allocations": len(torch_allocations),
+        "torch_allocated_mb": round(sum(torch_allocations) / 2 ** 20, 3),
+        "torch_copies": sum(event.name == "aten::copy_" for event in prof.events()),
+        "output_mb": round(output_bytes(output) / 2 ** 20, 3)
+    }
+
+
+def run_kernel(kernel, repeats, warmup):
+    results = []
+    groups = ([[item] for item in kernel.inputs] if kernel.per_input
+              else [kernel.inputs])
+    for inputs in groups:
+        output, result = measure(kernel.fn, inputs, repeats, warmup)
+        result = {"kernel": kernel.name,
+                  "input": (os.path.basename(inputs[0])
+                            if len(inputs) == 1 and isinstance(inputs[0], str)
+                            else f"{len(inputs)} inputs"),
+                  **result}
+
+        if kernel.reference is not None:
+            identical, max_diff = compare_outputs(output, kernel.reference(inputs[0]))
+            result["reference"] = kernel.reference.__name__
+        else:
+            identical, max_diff = compare_outputs(output, kernel.fn(inputs[0]))
+            result["reference"] = None
+        result["identical"] = bool(identical)
+        result["max_abs_diff"] = max_diff
+        results.append(result)
+
+        print(f"{kernel.name} [{result['input']}]: {result['mean_ms']:.2f} ms/call, "
+              f"python peak {result['python_peak_mb']:.1f} MB, "
+              f"torch {result['torch_allocated_mb']:.1f} MB in "
+              f"{result['torch_allocations']} allocations, "
+              f"{result['torch_copies']} copies, "
+              f"{'identical' if identical else 'MISMATCH'}"
+              f"{' to ' + result['reference'] if result['reference'] else ' across calls'}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fixture", type=str, action="append", default=None,
+                        help="mp4 clip to run the video and audio kernels on, "
+                             "repeatable. Defaults to generated clips.")
+    parser.add_argument("--media-dir", type=str,
+                        default=os.path.join(tempfile.gettempdir(),
+                                             "multimodal_benchmark_media"))
+    parser.add_argument("--kernels", type=str, default=",".join(KERNELS))
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--output", type=str, default=None)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    wanted = args.kernels.split(",")
+    unknown = set(wanted) - set(KERNELS)
+    if unknown:
+        raise SystemExit(f"Unknown kernels {sorted(unknown)}, "
+                         f"expected some of {list(KERNELS)}")
+
+    fixtures = args.fixture
+    if not fixtures:
+        # A MELD-length utterance and a clip past the 30 frame window
+        fixtures = [make_clip(args.media_dir, 3.0, 640, 360, 25, "speech"),
+                    make_clip(args.media_dir, 8.0, 1280, 720, 25, "speech")]
+    for fixture in fixtures:
+        # The reference writes its wav next to the clip, named after .mp4
+        if not fixture.endswith(".mp4"):
+            raise SystemExit(f"Fixtures must be .mp4 files: {fixture}")
+    os.makedirs(args.media_dir, exist_ok=True)
+
+    kernels = []
+    if {"VideoProcessor.process_video", "AudioProcessor.extract_features"} & set(wanted):
+        kernels += deployment_kernels(fixtures)
+    if {"MELDDataset._load_video_frames", "MELDDataset._extract_audio_features",
+            "tokenize_utterance"} & set(wanted):
+        kernels += dataset_kernels(fixtures, args.media_dir)
+    if {"analyze_video_frames", "analyze_audio"} & set(wanted):
+        kernels += backend_kernels(fixtures)
+
+    results = []
+    for kernel in kernels:
+        if kernel.name in wanted:
+            results += run_kernel(kernel, args.repeats, args.warmup)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "torch_threads": torch.get_num_threads(),
+        "fixtures": [os.path.basename(fixture) for fixture in fixtures],
+        "results": results
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    # A kernel that no longer matches its reference fails the run
+    if not all(result["identical"] for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
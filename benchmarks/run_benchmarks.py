@@ -0,0 +1,437 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from synthetic_media import make_clip, AUDIO_SOURCES
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DEPLOYMENT_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "deployment")
+PERCENTILES = (50, 95, 99)
+# Transcript given to every VAD chunk with --asr vad
+VAD_TRANSCRIPT = "this is a synthetic benchmark utterance"
+
+
+def latency_summary(seconds):
+    milliseconds = np.asarray(seconds, dtype=np.float64) * 1000
+    if not len(milliseconds):
+        return {"count": 0}
+    summary = {"count": len(milliseconds),
+               "mean_ms": round(float(milliseconds.mean()), 3)}
+    for q, value in zip(PERCENTILES, np.percentile(milliseconds, PERCENTILES)):
+        summary[f"p{q}_ms"] = round(float(value), 3)
+    return summary
+
+
+# Durations per named stage, appended from request and worker threads
+class StageRecorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def timed(self, stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            return {stage: latency_summary(values)
+                    for stage, values in self.samples.items()}
+
+
+# Peak RSS and CPU use of one process, this one unless pid is given (the
+# Flask server). Reads /proc where it exists; elsewhere only this process
+# can be measured, through getrusage and os.times.
+class ProcessMonitor:
+    def __init__(self, pid=None, interval=0.05):
+        self.pid = pid or os.getpid()
+        self.interval = interval
+        self.proc = os.path.exists(f"/proc/{self.pid}/status")
+        if not self.proc and self.pid != os.getpid():
+            raise ValueError(f"Cannot monitor process {self.pid} without /proc")
+        self.peak_rss = 0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def rss_bytes(self):
+        if self.proc:
+            with open(f"/proc/{self.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * 1024
+            return 0
+        if resource is None:
+            return 0
+        # Lifetime peak; kilobytes on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+    def cpu_seconds(self):
+        if self.proc:
+            with open(f"/proc/{self.pid}/stat") as f:
+                # The command name may contain spaces, fields follow its ")"
+                fields = f.read().rsplit(")", 1)[1].split()
+            return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+        times = os.times()
+        return times.user + times.system
+
+    def sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+    def start(self):
+        self.peak_rss = self.rss_bytes()
+        self.start_cpu = self.cpu_seconds()
+        self.start_time = time.perf_counter()
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+        wall = time.perf_counter() - self.start_time
+        cpu = self.cpu_seconds() - self.start_cpu
+        return {
+            "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1),
+            "cpu_seconds": round(cpu, 3),
+            # 1.0 is every core busy for the whole run
+            "cpu_utilization": round(cpu / wall / (os.cpu_count() or 1), 3)
+        }
+
+
+# The SageMaker handlers in this process: input_fn, predict_fn and
+# output_fn on local files. The stages inside predict_fn are timed by
+# wrapping the inference module's functions, per request for decode and
+# ASR, per call for prepare (one segment) and model (one batch).
+class PredictFnTarget:
+    name = "predict_fn"
+
+    def __init__(self, model_dir, asr="whisper"):
+        if DEPLOYMENT_DIR not in sys.path:
+            sys.path.insert(0, DEPLOYMENT_DIR)
+        import inference
+        self.inference = inference
+        self.stages = StageRecorder()
+        self.model_dict = inference.model_fn(model_dir)
+        self.instrument(asr)
+
+    def instrument(self, asr):
+        inference = self.inference
+        stages = self.stages
+        inference.open_segment_media = stages.timed(
+            "decode", inference.open_segment_media)
+        inference.prepare_segment = stages.timed(
+            "prepare", inference.prepare_segment)
+        inference.SegmentMedia.prepare = stages.timed(
+            "prepare", inference.SegmentMedia.prepare)
+        inference.predict_batch = stages.timed(
+            "model", inference.predict_batch)
+
+        iter_segments = inference.iter_segments if asr == "whisper" else vad_segments
+
+        def timed_segments(*args, **kwargs):
+            # ASR runs lazily as segments are pulled, time each step only
+            segments = iter_segments(*args, **kwargs)
+            total = 0.0
+            while True:
+                start = time.perf_counter()
+                segment = next(segments, None)
+                total += time.perf_counter() - start
+                if segment is None:
+                    break
+                yield segment
+            stages.add("asr", total)
+
+        inference.iter_segments = timed_segments
+
+    def run(self, video_path):
+        inference = self.inference
+        start = time.perf_counter()
+        input_data = inference.input_fn(json.dumps({"video_path": video_path}),
+                                        "application/json",
+                                        allow_local_paths=True)
+        self.stages.add("input", time.perf_counter() - start)
+
+        prediction = inference.predict_fn(input_data, self.model_dict)
+
+        start = time.perf_counter()
+        inference.output_fn(prediction, "application/json")
+        self.stages.add("output", time.perf_counter() - start)
+        return len(prediction["utterances"])
+
+
+def vad_segments(transcriber, video_path, waveform=None, **kwargs):
+    # VAD chunks with a fixed transcript instead of whisper decoding, so
+    # synthetic audio still reaches the text encoder and the rest of the
+    # pipeline can be measured without ASR
+    from asr import detect_speech
+    from multimodal_core.preprocessing import load_audio_waveform
+    if waveform is None:
+        waveform = load_audio_waveform(video_path)
+    for start, end in detect_speech(waveform[0].numpy()):
+        yield {"start": start, "end": end, "text": VAD_TRANSCRIPT}
+
+
+# ml_backend_enhanced's /analyze over HTTP. Stage times come from the
+# Server-Timing header the endpoint returns.
+class FlaskTarget:
+    name = "flask"
+
+    def __init__(self, url, timeout=600):
+        self.url = url
+        self.timeout = timeout
+        self.stages = StageRecorder()
+
+    def run(self, video_path):
+        boundary = uuid.uuid4().hex
+        with open(video_path, "rb") as f:
+            video = f.read()
+        body = b"".join([
+            f"--{boundary}\r\n".encode(),
+            (f'Content-Disposition: form-data; name="video"; '
+             f'filename="{os.path.basename(video_path)}"\r\n').encode(),
+            b"Content-Type: video/mp4\r\n\r\n",
+            video,
+            f"\r\n--{boundary}--\r\n".encode()
+        ])
+        request = urllib.request.Request(
+            self.url, data=body, method="POST",
+            headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+            server_timing = response.headers.get("Server-Timing", "")
+
+        for entry in server_timing.split(","):
+            name, *params = [part.strip() for part in entry.split(";")]
+            for param in params:
+                if param.startswith("dur="):
+                    self.stages.add(name, float(param[4:]) / 1000)
+        return 1
+
+
+def run_level(target, videos, concurrency, num_requests, monitor_pid=None):
+    # num_requests requests over the clips, concurrency at a time
+    target.stages.reset()
+    latencies = []
+    errors = 0
+    utterances = 0
+
+    def one_request(i):
+        start = time.perf_counter()
+        count = target.run(videos[i % len(videos)])
+        return time.perf_counter() - start, count
+
+    monitor = ProcessMonitor(monitor_pid)
+    monitor.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(one_request, i) for i in range(num_requests)]
+        for future in futures:
+            try:
+                latency, count = future.result()
+            except Exception as e:
+                print(f"Request failed: {str(e)}")
+                errors += 1
+                continue
+            latencies.append(latency)
+            utterances += count
+    wall = time.perf_counter() - start
+    resources = monitor.stop()
+
+    return {
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "errors": errors,
+        "utterances": utterances,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 4),
+        "latency": {"request": latency_summary(latencies),
+                    **target.stages.summary()},
+        **resources
+    }
+
+
+def compare(report, baseline, tolerance, min_delta_ms=1.0):
+    # Worse than the baseline by more than tolerance, per concurrency level:
+    # higher latency percentiles or peak RSS, lower throughput. Latencies
+    # must also grow by min_delta_ms, sub-millisecond stages are all noise.
+    regressions = []
+    baseline_levels = {level["concurrency"]: level
+                       for level in baseline["results"]}
+
+    def check(level, metric, new, old, higher_is_worse=True, min_delta=0.0):
+        if old is None or new is None or old <= 0 or abs(new - old) < min_delta:
+            return
+        change = (new - old) / old
+        if (change > tolerance) if higher_is_worse else (change < -tolerance):
+            regressions.append({"concurrency": level, "metric": metric,
+                                "baseline": old, "current": new,
+                                "change": round(change, 4)})
+
+    for level in report["results"]:
+        old = baseline_levels.get(level["concurrency"])
+        if old is None:
+            continue
+        concurrency = level["concurrency"]
+        for stage, summary in level["latency"].items():
+            old_summary = old["latency"].get(stage, {})
+            for q in PERCENTILES:
+                key = f"p{q}_ms"
+                check(concurrency, f"{stage}.{key}", summary.get(key),
+                      old_summary.get(key), min_delta=min_delta_ms)
+        check(concurrency, "throughput_rps", level["throughput_rps"],
+              old["throughput_rps"], higher_is_worse=False)
+        check(concurrency, "peak_rss_mb", level["peak_rss_mb"],
+              old["peak_rss_mb"])
+    return regressions
+
+
+def parse_list(value, cast=int):
+    return [cast(item) for item in value.split(",") if item]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--target", type=str, default="predict_fn",
+                        choices=["predict_fn", "flask"])
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--asr", type=str, default="whisper",
+                        choices=["whisper", "vad"],
+                        help="vad skips whisper and gives every speech chunk "
+                             "a fixed transcript")
+    parser.add_argument("--flask-url", type=str,
+                        default="http://127.0.0.1:5000/analyze")
+    parser.add_argument("--server-pid", type=int, default=None,
+                        help="Flask server process for RSS and CPU, "
+                             "without it this process is measured")
+    parser.add_argument("--media-dir", type=str,
+                        default=os.path.join(tempfile.gettempdir(),
+                                             "multimodal_benchmark_media"))
+    parser.add_argument("--durations", type=str, default="10",
+                        help="Clip lengths in seconds, comma separated")
+    parser.add_argument("--resolutions", type=str, default="640x360")
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--audio", type=str, default="speech",
+                        help="Comma separated, from " + ",".join(sorted(AUDIO_SOURCES)))
+    parser.add_argument("--concurrency", type=str, default="1,2,4")
+    parser.add_argument("--requests", type=int, default=8,
+                        help="Requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--output", type=str, default=None)
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Earlier report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Allowed relative change before a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Smallest latency increase counted as a regression")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    videos = []
+    for duration in parse_list(args.durations, float):
+        for resolution in args.resolutions.split(","):
+            width, height = (int(x) for x in resolution.split("x"))
+            for audio in args.audio.split(","):
+                videos.append(make_clip(args.media_dir, duration, width,
+                                        height, args.fps, audio))
+
+    if args.target == "flask":
+        target = FlaskTarget(args.flask_url)
+        monitor_pid = args.server_pid
+    else:
+        target = PredictFnTarget(args.model_dir, args.asr)
+        monitor_pid = None
+
+    for i in range(args.warmup):
+        target.run(videos[i % len(videos)])
+
+    results = []
+    for concurrency in parse_list(args.concurrency):
+        level = run_level(target, videos, concurrency, args.requests, monitor_pid)
+        request = level["latency"]["request"]
+        print(f"Concurrency {concurrency}: {level['throughput_rps']:.3f} req/s, "
+              f"p50 {request.get('p50_ms', 0):.0f} ms, "
+              f"p99 {request.get('p99_ms', 0):.0f} ms, "
+              f"peak RSS {level['peak_rss_mb']:.0f} MB, "
+              f"CPU {100 * level['cpu_utilization']:.0f}%")
+        results.append(level)
+
+    report = {
+        "target": target.name,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "config": {
+            "clips": [os.path.basename(video) for video in videos],
+            "asr": args.asr if args.target == "predict_fn" else None,
+            "requests": args.requests,
+            "warmup": args.warmup
+        },
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("config") != report["config"]:
+            print("Warning: baseline was run with a different configuration")
+        regressions = compare(report, baseline, args.tolerance,
+                              args.min_delta_ms)
+        report["baseline"] = args.baseline
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION at concurrency {regression['concurrency']}: "
+                  f"{regression['metric']} {regression['baseline']} -> "
+                  f"{regression['current']} ({100 * regression['change']:+.1f}%)")
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+        print(f"Report written to {args.output}")
+    else:
+        print(text)
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
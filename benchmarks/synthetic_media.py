@@ -0,0 +1,76 @@
+import argparse
+import os
+import subprocess
+import sys
+
+try:
+    from multimodal_core.runtime import ffmpeg_binary
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.runtime import ffmpeg_binary
+
+# lavfi audio sources. "speech" is tone bursts with pauses, so the VAD
+# finds several chunks the way it would in a conversation.
+AUDIO_SOURCES = {
+    "speech": "aevalsrc='0.5*sin(2*PI*(180+40*sin(2*PI*3*t))*t)"
+              "*lt(mod(t,{period}),{burst})':s={rate}",
+    "tone": "sine=frequency=440:sample_rate={rate}",
+    "noise": "anoisesrc=color=pink:amplitude=0.3:sample_rate={rate}",
+    "silence": "anullsrc=channel_layout=mono:sample_rate={rate}"
+}
+
+
+def clip_name(duration, width, height, fps, audio):
+    return f"synthetic_{duration:g}s_{width}x{height}_{fps}fps_{audio}.mp4"
+
+
+def make_clip(output_dir, duration=10.0, width=640, height=360, fps=25,
+              audio="speech", burst=2.0, period=3.0, sample_rate=44100):
+    # Moving test pattern plus the chosen audio. Clips are reused when a
+    # file with the same parameters exists, so runs compare like for like.
+    if audio not in AUDIO_SOURCES:
+        raise ValueError(f"Unknown audio kind {audio}, "
+                         f"expected one of {sorted(AUDIO_SOURCES)}")
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, clip_name(duration, width, height, fps, audio))
+    if os.path.exists(path):
+        return path
+
+    audio_source = AUDIO_SOURCES[audio].format(
+        period=period, burst=burst, rate=sample_rate)
+    temp_path = path + ".part.mp4"
+    subprocess.run([
+        ffmpeg_binary(), '-y',
+        '-f', 'lavfi', '-i', f'testsrc2=size={width}x{height}:rate={fps}',
+        '-f', 'lavfi', '-i', audio_source,
+        '-t', str(duration),
+        '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+        '-c:a', 'aac',
+        '-loglevel', 'error',
+        temp_path
+    ], check=True)
+    os.replace(temp_path, path)
+    return path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", type=str, required=True)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--fps", type=int, default=25)
+    parser.add_argument("--audio", type=str, default="speech",
+                        choices=sorted(AUDIO_SOURCES))
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    print(make_clip(args.output_dir, args.duration, args.width, args.height,
+                    args.fps, args.audio))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+import torch
+from preprocessing_benchmarks import Kernel, compare_outputs, run_kernel
+
+
+def test_compare_outputs_is_bit_exact():
+    a = torch.arange(12, dtype=torch.float32).reshape(3, 4) / 7
+    assert compare_outputs(a, a.clone()) == (True, 0.0)
+
+    identical, max_diff = compare_outputs(a, a + 1e-6)
+    assert not identical and 0 < max_diff < 1e-5
+    # Same values in another dtype or shape are a mismatch
+    assert not compare_outputs(a, a.double())[0]
+    assert not compare_outputs(a, a.reshape(4, 3))[0]
+
+    encoding = {"input_ids": torch.ones(1, 4), "attention_mask": np.ones((1, 4))}
+    assert compare_outputs(encoding, {k: v.copy() if isinstance(v, np.ndarray)
+                                      else v.clone() for k, v in encoding.items()})[0]
+    assert compare_outputs({"brightness": 0.5}, {"brightness": 0.5})[0]
+
+
+def test_run_kernel_counts_copies_and_checks_reference():
+    inputs = [torch.ones(64, 64), torch.zeros(32, 32)]
+
+    # Transposed then made contiguous: one allocation and one copy per call
+    kernel = Kernel("transpose", lambda x: x.t().contiguous(), inputs,
+                    reference=lambda x: x.t().clone())
+    results = run_kernel(kernel, repeats=3, warmup=1)
+    assert [r["identical"] for r in results] == [True, True]
+    assert results[0]["torch_copies"] == 1
+    assert results[0]["output_mb"] == round(64 * 64 * 4 / 2 ** 20, 3)
+
+    wrong = Kernel("wrong", lambda x: x * 2, inputs[:1], reference=lambda x: x)
+    assert not run_kernel(wrong, repeats=1, warmup=0)[0]["identical"]
+
+
+if __name__ == "__main__":
+    test_compare_outputs_is_bit_exact()
+    test_run_kernel_counts_copies_and_checks_reference()
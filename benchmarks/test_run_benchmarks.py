@@ -0,0 +1,43 @@
+import copy
+from run_benchmarks import latency_summary, compare
+
+
+def make_report(p99_ms, throughput, rss):
+    return {"results": [{
+        "concurrency": 2,
+        "latency": {"request": {"p50_ms": 100.0, "p95_ms": 150.0, "p99_ms": p99_ms}},
+        "throughput_rps": throughput,
+        "peak_rss_mb": rss
+    }]}
+
+
+def test_latency_summary():
+    summary = latency_summary([i / 1000 for i in range(1, 101)])
+    assert summary["count"] == 100
+    assert abs(summary["p50_ms"] - 50.5) < 1e-6
+    assert abs(summary["p99_ms"] - 99.01) < 1e-6
+    assert latency_summary([]) == {"count": 0}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = make_report(200.0, 4.0, 1000.0)
+    assert compare(copy.deepcopy(baseline), baseline, 0.1) == []
+
+    # 5% slower is within tolerance, 50% slower and a drop in throughput are not
+    assert compare(make_report(210.0, 4.0, 1000.0), baseline, 0.1) == []
+    regressions = compare(make_report(300.0, 3.0, 1050.0), baseline, 0.1)
+    assert {r["metric"] for r in regressions} == {"request.p99_ms", "throughput_rps"}
+
+    # Large relative change of a sub-millisecond stage stays below the floor
+    tiny = make_report(200.0, 4.0, 1000.0)
+    tiny["results"][0]["latency"]["input"] = {"p50_ms": 0.1}
+    baseline["results"][0]["latency"]["input"] = {"p50_ms": 0.05}
+    assert compare(tiny, baseline, 0.1) == []
+
+    # Faster and lighter is never a regression
+    assert compare(make_report(100.0, 8.0, 500.0), baseline, 0.1) == []
+
+
+if __name__ == "__main__":
+    test_latency_summary()
+    test_compare_flags_regressions_beyond_tolerance()
@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import numpy as np
+import torch
+import whisper
+
+try:
+    from multimodal_core.preprocessing import load_audio_waveform, SAMPLE_RATE
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import load_audio_waveform, SAMPLE_RATE
+
+FRAME_SECONDS = 0.03
+MIN_SPEECH_SECONDS = 0.25
+MERGE_GAP_SECONDS = 0.5
+PAD_SECONDS = 0.2
+# Whisper decodes 30 second windows, longer speech is split
+MAX_CHUNK_SECONDS = 30.0
+
+# Same cutoffs transcribe() uses to drop hallucinated text on silence
+NO_SPEECH_THRESHOLD = 0.6
+LOGPROB_THRESHOLD = -1.0
+# Time step of whisper's timestamp tokens
+TIMESTAMP_SECONDS = 0.02
+
+# Whisper decoding installs kv-cache hooks on the shared model, concurrent
+# requests would write into each other's caches
+_decode_lock = threading.Lock()
+
+
+def detect_speech(waveform, sample_rate=SAMPLE_RATE, min_energy_db=-45.0,
+                  noise_margin_db=12.0):
+    # Energy VAD on a mono float waveform in [-1, 1]. Returns (start, end)
+    # pairs in seconds. A frame is speech when its energy is both above an
+    # absolute floor and noise_margin_db above the quietest 10% of frames.
+    frame_length = int(FRAME_SECONDS * sample_rate)
+    num_frames = len(waveform) // frame_length
+    if num_frames == 0:
+        return []
+
+    frames = waveform[:num_frames * frame_length].reshape(num_frames, frame_length)
+    energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+    noise_db = np.percentile(energy_db, 10)
+    if np.percentile(energy_db, 90) - noise_db < noise_margin_db:
+        # No quiet stretch to estimate the noise floor from
+        threshold = min_energy_db
+    else:
+        threshold = max(min_energy_db, noise_db + noise_margin_db)
+    speech = energy_db > threshold
+
+    regions = []
+    start = None
+    for i, is_speech in enumerate(np.append(speech, False)):
+        if is_speech and start is None:
+            start = i
+        elif not is_speech and start is not None:
+            regions.append([start * FRAME_SECONDS, i * FRAME_SECONDS])
+            start = None
+
+    # Merge short pauses, drop blips, pad the edges
+    merged = []
+    for start, end in regions:
+        if merged and start - merged[-1][1] < MERGE_GAP_SECONDS:
+            merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    duration = len(waveform) / sample_rate
+    chunks = []
+    for start, end in merged:
+        if end - start < MIN_SPEECH_SECONDS:
+            continue
+        start = max(0.0, start - PAD_SECONDS)
+        end = min(duration, end + PAD_SECONDS)
+
+        num_chunks = int(np.ceil((end - start) / MAX_CHUNK_SECONDS))
+        step = (end - start) / num_chunks
+        for i in range(num_chunks):
+            chunks.append((start + i * step, start + (i + 1) * step))
+
+    return chunks
+
+
+def split_at_timestamps(tokens, tokenizer, duration):
+    # Whisper's own sentence-level segments within one decoded chunk:
+    # <|0.00|> text <|2.40|><|2.40|> text <|5.00|>. Returns (start, end,
+    # text) in seconds from the chunk start. Text without a closing
+    # timestamp runs to the end of the chunk.
+    segments = []
+    start = 0.0
+    text_tokens = []
+    for token in list(tokens) + [None]:
+        if token is not None and token < tokenizer.timestamp_begin:
+            text_tokens.append(token)
+            continue
+
+        time = (duration if token is None
+                else (token - tokenizer.timestamp_begin) * TIMESTAMP_SECONDS)
+        time = min(time, duration)
+        if text_tokens:
+            text = tokenizer.decode(text_tokens).strip()
+            if text:
+                segments.append((start, max(time, start + TIMESTAMP_SECONDS),
+                                 text))
+            text_tokens = []
+        start = time
+    return segments
+
+
+def iter_segments(transcriber, video_path, batch_size=8,
+                  word_timestamps=False, language=None, waveform=None):
+    # Only the speech chunks found by the VAD reach whisper, decoded in
+    # batches through the encoder and decoder. The VAD only decides what
+    # whisper hears; utterances are whisper's own timestamped segments
+    # inside each chunk, as transcribe() would give. Segments are yielded
+    # batch by batch, so callers can start on the first ones while later
+    # chunks are still being decoded. waveform is the [1, num_samples]
+    # audio when the caller has decoded it already.
+    if waveform is None:
+        waveform = load_audio_waveform(video_path)
+    waveform = waveform[0].numpy()
+    chunks = detect_speech(waveform)
+
+    device = next(transcriber.parameters()).device
+    tokenizer = whisper.tokenizer.get_tokenizer(
+        transcriber.is_multilingual, num_languages=transcriber.num_languages)
+
+    for i in range(0, len(chunks), batch_size):
+        batch = chunks[i:i + batch_size]
+        audio = [waveform[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)]
+                 for start, end in batch]
+
+        if word_timestamps:
+            # Opt-in, needs the sequential transcribe() alignment pass
+            for (start, end), chunk in zip(batch, audio):
+                with _decode_lock:
+                    result = transcriber.transcribe(
+                        chunk, word_timestamps=True, language=language,
+                        fp16=device.type == "cuda")
+                for s in result["segments"]:
+                    text = s["text"].strip()
+                    if text:
+                        yield {
+                            "start": start + s["start"],
+                            "end": min(end, start + s["end"]),
+                            "text": text,
+                            "words": [{**word,
+                                       "start": start + word["start"],
+                                       "end": start + word["end"]}
+                                      for word in s.get("words", [])]
+                        }
+            continue
+
+        mel = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(chunk),
+                                        n_mels=transcriber.dims.n_mels)
+            for chunk in audio
+        ]).to(device)
+
+        options = whisper.DecodingOptions(language=language,
+                                          fp16=device.type == "cuda")
+        with _decode_lock, torch.inference_mode():
+            results = whisper.decode(transcriber, mel, options)
+
+        for (start, end), result in zip(batch, results):
+            if (result.no_speech_prob > NO_SPEECH_THRESHOLD
+                    and result.avg_logprob < LOGPROB_THRESHOLD):
+                continue
+            for offset, offset_end, text in split_at_timestamps(
+                    result.tokens, tokenizer, end - start):
+                yield {"start": start + offset, "end": start + offset_end,
+                       "text": text}
@@ -0,0 +1,133 @@
+import argparse
+import glob
+import json
+import os
+import time
+from inference import model_fn, predict_videos, MultimodalSentimentModel
+from response_format import (
+    strip_fields, encode_json, PROBABILITY_FIELDS, EMBEDDING_FIELDS)
+from vector_index import VectorIndex
+
+
+# Offline backfill over many clips with the same engine as batch requests
+# to the endpoint: one model load, cross-video model batches, one ndjson
+# line per video in the output.
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", type=str, default=None)
+    source.add_argument("--manifest", type=str, default=None,
+                        help="Text file with one local path or s3:// URI per line")
+    parser.add_argument("--pattern", type=str, default="*.mp4")
+    parser.add_argument("--output", type=str, required=True)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip videos already in --output")
+    parser.add_argument("--index-dir", type=str, default=None,
+                        help="Add each utterance's fused embedding to this "
+                             "vector index")
+
+    return parser.parse_args()
+
+
+def list_videos(args):
+    if args.input_dir:
+        return sorted(glob.glob(os.path.join(args.input_dir, "**", args.pattern),
+                                recursive=True))
+
+    with open(args.manifest) as f:
+        return [line.strip() for line in f
+                if line.strip() and not line.startswith("#")]
+
+
+def completed_videos(output_path):
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                # Partial last line from an interrupted run
+                continue
+            if "error" not in result:
+                done.add(result["video_path"])
+    return done
+
+
+def main():
+    args = parse_args()
+    if args.batch_size is not None:
+        os.environ["MODEL_BATCH_SIZE"] = str(args.batch_size)
+
+    video_paths = list_videos(args)
+    if args.resume:
+        done = completed_videos(args.output)
+        video_paths = [path for path in video_paths if path not in done]
+    if not video_paths:
+        print("No videos to process")
+        return
+
+    model_dict = model_fn(args.model_dir)
+    print(f"Processing {len(video_paths)} videos")
+
+    # Embeddings go to the index, not the ndjson output
+    index = None
+    if args.index_dir:
+        if not isinstance(model_dict['model'], MultimodalSentimentModel):
+            raise SystemExit("--index-dir needs the PyTorch model, exported "
+                             "TorchScript and ONNX graphs only output logits")
+        index = VectorIndex(args.index_dir, writable=True)
+    # Videos whose rows are already in the index, from a run interrupted
+    # after index.add but before the output line was written
+    indexed = ({m["video_path"] for m in index.metadata}
+               if index is not None and args.resume else set())
+    dropped_fields = PROBABILITY_FIELDS + EMBEDDING_FIELDS
+
+    start_time = time.perf_counter()
+    num_errors = 0
+    num_utterances = 0
+    with open(args.output, "ab" if args.resume else "wb") as f:
+        for i, result in enumerate(predict_videos(
+                {"video_paths": video_paths,
+                 "allow_local_paths": True,
+                 "return_embeddings": index is not None}, model_dict)):
+            # Only complete videos are indexed. One with an error is run
+            # again by --resume and indexed then.
+            if (index is not None and result["utterances"]
+                    and "error" not in result
+                    and result["video_path"] not in indexed):
+                index.add(
+                    [u["fused_embedding"] for u in result["utterances"]],
+                    [{"video_path": result["video_path"],
+                      "start_time": u["start_time"],
+                      "end_time": u["end_time"],
+                      "text": u["text"],
+                      "emotion": u["emotions"][0]["label"],
+                      "sentiment": u["sentiments"][0]["label"]}
+                     for u in result["utterances"]])
+
+            f.write(encode_json(strip_fields(result, dropped_fields)) + b"\n")
+            f.flush()
+
+            num_utterances += len(result["utterances"])
+            if "error" in result:
+                num_errors += 1
+                print(f"Failed {result['video_path']}: {result['error']}")
+            if (i + 1) % 100 == 0:
+                print(f"{i + 1}/{len(video_paths)} videos done")
+
+    if index is not None:
+        index.close()
+        print(f"Vector index: {len(index)} utterances in {args.index_dir}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"Done: {len(video_paths)} videos, {num_utterances} utterances, "
+          f"{num_errors} errors in {elapsed:.1f}s "
+          f"({len(video_paths) / elapsed:.2f} videos/s)")
+
+
+if __name__ == "__main__":
+    main()
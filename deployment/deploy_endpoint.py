@@ -14,7 +14,9 @@ def deploy_endpoint():
         framework_version="2.5.1",
         py_version="py311",
         entry_point="inference.py",
+        # Ships requirements.txt, which brings the imageio-ffmpeg binary
         source_dir=".",
+        dependencies=["../multimodal_core"],
         name="sentiment-analysis-model",
     )
 
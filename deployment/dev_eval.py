@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import pandas as pd
+import torch
+
+try:
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, tokenize_utterance,
+        get_video_profile)
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, tokenize_utterance,
+        get_video_profile)
+
+EMOTION_LABELS = {'anger': 0, 'disgust': 1, 'fear': 2,
+                  'joy': 3, 'neutral': 4, 'sadness': 5, 'surprise': 6}
+SENTIMENT_LABELS = {'negative': 0, 'neutral': 1, 'positive': 2}
+
+
+# Preprocessed MELD utterances, one at a time like the endpoint sees them
+def load_dev_samples(csv_path, video_dir, tokenizer, max_samples=None,
+                     video_profile='default'):
+    data = pd.read_csv(csv_path)
+    profile = get_video_profile(video_profile)
+    samples = []
+
+    for _, row in data.iterrows():
+        if max_samples is not None and len(samples) >= max_samples:
+            break
+
+        path = os.path.join(
+            video_dir, f"dia{row['Dialogue_ID']}_utt{row['Utterance_ID']}.mp4")
+        if not os.path.exists(path):
+            continue
+
+        try:
+            start = time.perf_counter()
+            video_frames = load_video_frames(path, **profile)
+            video_time = time.perf_counter() - start
+            audio_features = extract_audio_features(path)
+        except ValueError as e:
+            print(f"Error processing {path}: {str(e)}")
+            continue
+
+        samples.append({
+            'text': row['Utterance'],
+            'text_inputs': dict(tokenize_utterance(tokenizer, row['Utterance'])),
+            'video_frames': video_frames.unsqueeze(0),
+            'audio_features': audio_features.unsqueeze(0),
+            'emotion_label': EMOTION_LABELS[row['Emotion'].lower()],
+            'sentiment_label': SENTIMENT_LABELS[row['Sentiment'].lower()],
+            'video_load_time': video_time
+        })
+
+    return samples
+
+
+def predict_samples(model, samples, gate=None):
+    # Top-1 predictions and per-utterance forward latency in seconds.
+    # gate(sample) returns extra forward kwargs and is timed with the model.
+    emotions, sentiments, latencies = [], [], []
+
+    with torch.inference_mode():
+        for sample in samples:
+            start = time.perf_counter()
+            kwargs = gate(sample) if gate is not None else {}
+            outputs = model(sample['text_inputs'],
+                            sample['video_frames'],
+                            sample['audio_features'],
+                            **kwargs)
+            latencies.append(time.perf_counter() - start)
+
+            emotions.append(outputs['emotions'].argmax(dim=1).item())
+            sentiments.append(outputs['sentiments'].argmax(dim=1).item())
+
+    return {'emotions': emotions, 'sentiments': sentiments, 'latencies': latencies}
+
+
+def agreement(a, b):
+    return sum(x == y for x, y in zip(a, b)) / max(len(a), 1)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(int(q / 100 * len(values)), len(values) - 1)]
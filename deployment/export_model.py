@@ -0,0 +1,79 @@
+import argparse
+import os
+import torch
+from transformers import AutoTokenizer
+from inference import load_model
+from quantization import quantize_model, load_calibration
+from torchscript_model import ExportWrapper, EXPORTED_MODEL_FILE, TOKENIZER_DIR
+from onnx_backend import export_onnx, OnnxSentimentModel, ONNX_MODEL_FILE
+
+
+def example_inputs(device, batch_size=1):
+    return (torch.ones(batch_size, 128, dtype=torch.long, device=device),
+            torch.ones(batch_size, 128, dtype=torch.long, device=device),
+            torch.zeros(batch_size, 30, 3, 224, 224, device=device),
+            torch.zeros(batch_size, 1, 64, 300, device=device))
+
+
+def export_model(model, path, device):
+    wrapper = ExportWrapper(model).eval()
+
+    with torch.no_grad():
+        traced = torch.jit.trace(wrapper, example_inputs(device))
+        # Inline the weights as constants and fold BatchNorm into the convs
+        traced = torch.jit.freeze(traced)
+
+    traced.save(path)
+    return traced
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--output-dir", type=str, default=None)
+    parser.add_argument("--device", type=str, default="cpu")
+    parser.add_argument("--format", type=str, default="torchscript",
+                        choices=["torchscript", "onnx"])
+    parser.add_argument("--quantized", action="store_true",
+                        help="Export the int8 model, CPU only")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    output_dir = args.output_dir or args.model_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    # The trace records the device, export on the device the endpoint uses
+    device = torch.device(args.device)
+    model = load_model(args.model_dir, device)
+
+    if args.quantized:
+        if device.type != "cpu" or args.format != "torchscript":
+            raise ValueError("Quantized export is CPU TorchScript only")
+        model = quantize_model(model, load_calibration(args.model_dir))
+
+    if args.format == "onnx":
+        path = os.path.join(output_dir, ONNX_MODEL_FILE)
+        export_onnx(model, path, example_inputs(device))
+        exported = OnnxSentimentModel(path).forward
+    else:
+        path = os.path.join(output_dir, EXPORTED_MODEL_FILE)
+        exported = export_model(model, path, device)
+    print(f"Saved exported model to {path}")
+
+    # Check the artifact against the eager model before shipping it
+    inputs = example_inputs(device, batch_size=2)
+    with torch.no_grad():
+        expected = ExportWrapper(model)(*inputs)
+        actual = exported(*inputs)
+    for name, a, b in zip(('emotions', 'sentiments'), expected, actual):
+        print(f"{name} max abs diff: {(a - b.to(a.device)).abs().max().item():.2e}")
+
+    AutoTokenizer.from_pretrained('bert-base-uncased').save_pretrained(
+        os.path.join(output_dir, TOKENIZER_DIR))
+
+
+if __name__ == "__main__":
+    main()
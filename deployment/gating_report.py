@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import sys
+import torch
+from transformers import AutoTokenizer
+from inference import load_model
+from dev_eval import load_dev_samples, predict_samples, agreement, percentile
+
+try:
+    from multimodal_core.gating import skip_masks, SkipStats, MOTION_THRESHOLD
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.gating import skip_masks, SkipStats, MOTION_THRESHOLD
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--dev-csv", type=str,
+                        default="../dataset/dev/dev_sent_emo.csv")
+    parser.add_argument("--dev-video-dir", type=str,
+                        default="../dataset/dev/dev_splits_complete")
+    parser.add_argument("--max-samples", type=int, default=None)
+    parser.add_argument("--motion-thresholds", type=float, nargs="+",
+                        default=[0.5, MOTION_THRESHOLD, 2.0, 4.0])
+    parser.add_argument("--output", type=str, default=None)
+
+    return parser.parse_args()
+
+
+def summarize(predictions, samples, baseline=None):
+    summary = {
+        'emotion_accuracy': agreement(
+            predictions['emotions'], [s['emotion_label'] for s in samples]),
+        'sentiment_accuracy': agreement(
+            predictions['sentiments'], [s['sentiment_label'] for s in samples]),
+        'latency_mean_ms': 1000 * sum(predictions['latencies']) / len(samples),
+        'latency_p95_ms': 1000 * percentile(predictions['latencies'], 95)
+    }
+    if baseline is not None:
+        summary['emotion_agreement'] = agreement(
+            predictions['emotions'], baseline['emotions'])
+        summary['sentiment_agreement'] = agreement(
+            predictions['sentiments'], baseline['sentiments'])
+    return summary
+
+
+def main():
+    args = parse_args()
+    model = load_model(args.model_dir, torch.device("cpu"))
+    tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
+
+    samples = load_dev_samples(args.dev_csv, args.dev_video_dir, tokenizer,
+                               max_samples=args.max_samples)
+    if not samples:
+        raise ValueError(f"No dev samples found in {args.dev_video_dir}")
+    print(f"Loaded {len(samples)} dev utterances")
+
+    baseline = predict_samples(model, samples)
+    report = {'num_samples': len(samples),
+              'all_encoders': summarize(baseline, samples),
+              'gated': {}}
+
+    for threshold in args.motion_thresholds:
+        stats = SkipStats()
+
+        def gate(sample):
+            skip_text, skip_video = skip_masks(
+                [sample['text']], sample['video_frames'], threshold)
+            stats.update(skip_text, skip_video)
+            return {'skip_text': skip_text, 'skip_video': skip_video}
+
+        predictions = predict_samples(model, samples, gate=gate)
+        report['gated'][str(threshold)] = {
+            **stats.rates(), **summarize(predictions, samples, baseline)}
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,168 +1,67 @@
+import time
+_import_start = time.perf_counter()
+
 import torch
 from models import MultimodalSentimentModel
 import os
-import cv2
-import numpy as np
 import subprocess
-import torchaudio
 import whisper
-from transformers import AutoTokenizer
 import sys
 import json
-import boto3
 import tempfile
+import functools
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from quantization import quantize_model, load_calibration
+from torchscript_model import find_exported_model, load_exported_model, load_tokenizer
+from onnx_backend import load_onnx_model
+from asr import iter_segments
+from s3_cache import get_video_cache
+from response_format import strip_fields, encode_json, encode_npz
+
+try:
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, load_audio_waveform,
+        tokenize_utterance, get_video_profile)
+    from multimodal_core.text_cache import TextEmbeddingCache
+    from multimodal_core.gating import skip_masks, SkipStats, MOTION_THRESHOLD
+    from multimodal_core.runtime import ffmpeg_binary, preflight_ffmpeg, PhaseTimer
+    from multimodal_core.frame_cache import FrameBuffer, segment_audio_features
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, load_audio_waveform,
+        tokenize_utterance, get_video_profile)
+    from multimodal_core.text_cache import TextEmbeddingCache
+    from multimodal_core.gating import skip_masks, SkipStats, MOTION_THRESHOLD
+    from multimodal_core.runtime import ffmpeg_binary, preflight_ffmpeg, PhaseTimer
+    from multimodal_core.frame_cache import FrameBuffer, segment_audio_features
 
 EMOTION_MAP = {0: "anger", 1: "disgust", 2: "fear",
                3: "joy", 4: "neutral", 5: "sadness", 6: "surprise"}
 SENTIMENT_MAP = {0: "negative", 1: "neutral", 2: "positive"}
+# Per-modality 128-dim projections and the 256-dim fused vector
+EMBEDDING_NAMES = ("text", "video", "audio", "fused")
 
-
-def install_ffmpeg():
-    print("Starting Ffmpeg installation...")
-
-    subprocess.check_call([sys.executable, "-m", "pip",
-                          "install", "--upgrade", "pip"])
-
-    subprocess.check_call([sys.executable, "-m", "pip",
-                          "install", "--upgrade", "setuptools"])
-
-    try:
-        subprocess.check_call([sys.executable, "-m", "pip",
-                               "install", "ffmpeg-python"])
-        print("Installed ffmpeg-python successfully")
-    except subprocess.CalledProcessError as e:
-        print("Failed to install ffmpeg-python via pip")
-
-    try:
-        subprocess.check_call([
-            "wget",
-            "https://johnvansickle.com/ffmpeg/releases/ffmpeg-release-amd64-static.tar.xz",
-            "-O", "/tmp/ffmpeg.tar.xz"
-        ])
-
-        subprocess.check_call([
-            "tar", "-xf", "/tmp/ffmpeg.tar.xz", "-C", "/tmp/"
-        ])
-
-        result = subprocess.run(
-            ["find", "/tmp", "-name", "ffmpeg", "-type", "f"],
-            capture_output=True,
-            text=True
-        )
-        ffmpeg_path = result.stdout.strip()
-
-        subprocess.check_call(["cp", ffmpeg_path, "/usr/local/bin/ffmpeg"])
-
-        subprocess.check_call(["chmod", "+x", "/usr/local/bin/ffmpeg"])
-
-        print("Installed static FFmpeg binary successfully")
-    except Exception as e:
-        print(f"Failed to install static FFmpeg: {e}")
-
-    try:
-        result = subprocess.run(["ffmpeg", "-version"],
-                                capture_output=True, text=True, check=True)
-        print("FFmpeg version:")
-        print(result.stdout)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("FFmpeg installation verification failed")
-        return False
+IMPORT_SECONDS = time.perf_counter() - _import_start
 
 
+# Same preprocessing as training, see multimodal_core.preprocessing
 class VideoProcessor:
-    def process_video(self, video_path):
-        cap = cv2.VideoCapture(video_path)
-        frames = []
-
-        try:
-            if not cap.isOpened():
-                raise ValueError(f"Video not found: {video_path}")
-
-            # Try and read first frame to validate video
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                raise ValueError(f"Video not found: {video_path}")
-
-            # Reset index to not skip first frame
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    def __init__(self, profile=None):
+        # VIDEO_PROFILE trades r3d_18 input size for latency, see
+        # video_profile_report.py for each profile's dev accuracy
+        self.profile = get_video_profile(
+            profile or os.environ.get("VIDEO_PROFILE", "default"))
 
-            while len(frames) < 30 and cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                frame = cv2.resize(frame, (224, 224))
-                frame = frame / 255.0
-                frames.append(frame)
-
-        except Exception as e:
-            raise ValueError(f"Video error: {str(e)}")
-        finally:
-            cap.release()
-
-        if (len(frames) == 0):
-            raise ValueError("No frames could be extracted")
-
-        # Pad or truncate frames
-        if len(frames) < 30:
-            frames += [np.zeros_like(frames[0])] * (30 - len(frames))
-        else:
-            frames = frames[:30]
-
-        # Before permute: [frames, height, width, channels]
-        # After permute: [frames, channels, height, width]
-        return torch.FloatTensor(np.array(frames)).permute(0, 3, 1, 2)
+    def process_video(self, video_path):
+        return load_video_frames(video_path, **self.profile)
 
 
 class AudioProcessor:
     def extract_features(self, video_path, max_length=300):
-        audio_path = video_path.replace('.mp4', '.wav')
-
-        try:
-            subprocess.run([
-                'ffmpeg',
-                '-i', video_path,
-                '-vn',
-                '-acodec', 'pcm_s16le',
-                '-ar', '16000',
-                '-ac', '1',
-                audio_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            waveform, sample_rate = torchaudio.load(audio_path)
-
-            if sample_rate != 16000:
-                resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                waveform = resampler(waveform)
-
-            mel_spectrogram = torchaudio.transforms.MelSpectrogram(
-                sample_rate=16000,
-                n_mels=64,
-                n_fft=1024,
-                hop_length=512
-            )
-
-            mel_spec = mel_spectrogram(waveform)
-
-            # Normalize
-            mel_spec = (mel_spec - mel_spec.mean()) / mel_spec.std()
-
-            if mel_spec.size(2) < 300:
-                padding = 300 - mel_spec.size(2)
-                mel_spec = torch.nn.functional.pad(mel_spec, (0, padding))
-            else:
-                mel_spec = mel_spec[:, :, :300]
-
-            return mel_spec
-
-        except subprocess.CalledProcessError as e:
-            raise ValueError(f"Audio extraction error: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Audio error: {str(e)}")
-        finally:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
+        return extract_audio_features(video_path, max_length)
 
 
 class VideoUtteranceProcessor:
@@ -176,7 +75,7 @@ class VideoUtteranceProcessor:
             temp_dir, f"segment_{start_time}_{end_time}.mp4")
 
         subprocess.run([
-            "ffmpeg", "-i", video_path,
+            ffmpeg_binary(), "-i", video_path,
             "-ss", str(start_time),
             "-to", str(end_time),
             "-c:v", "libx264",
@@ -192,38 +91,94 @@ class VideoUtteranceProcessor:
 
 
 def download_from_s3(s3_uri):
-    s3_client = boto3.client("s3")
-    bucket = s3_uri.split("/")[2]
-    key = "/".join(s3_uri.split("/")[3:])
+    # Local copy from the shared on-disk cache, pinned until the request
+    # calls release_video()
+    return get_video_cache().acquire(s3_uri)
+
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp4") as temp_file:
-        s3_client.download_file(bucket, key, temp_file.name)
-        return temp_file.name
+def release_video(input_data):
+    if input_data.get('cached'):
+        get_video_cache().release(input_data['video_path'])
 
 
-def input_fn(request_body, request_content_type):
+def input_fn(request_body, request_content_type, allow_local_paths=False):
+    # The endpoint only reads s3:// URIs. Local paths would let a caller
+    # make the container read any file, serve_local.py opts in to them.
     if request_content_type == "application/json":
         input_data = json.loads(request_body)
-        s3_uri = input_data['video_path']
-        local_path = download_from_s3(s3_uri)
-        return {"video_path": local_path}
+        # Batch request: videos are fetched by predict_videos, so one bad
+        # path fails only its own item
+        if 'video_paths' in input_data:
+            video_paths = input_data['video_paths']
+            if not isinstance(video_paths, list) or not video_paths:
+                raise ValueError("video_paths must be a non-empty list")
+            return {"video_paths": [str(path) for path in video_paths],
+                    "allow_local_paths": allow_local_paths,
+                    "stream": bool(input_data.get('stream', False)),
+                    "return_embeddings": bool(
+                        input_data.get('return_embeddings', False))}
+
+        video_path = input_data['video_path']
+        cached = video_path.startswith("s3://")
+        if cached:
+            video_path = download_from_s3(video_path)
+        elif not allow_local_paths:
+            raise ValueError("video_path must be an s3:// URI")
+        elif not os.path.exists(video_path):
+            raise ValueError(f"Video not found: {video_path}")
+        return {"video_path": video_path,
+                "cached": cached,
+                "stream": bool(input_data.get('stream', False)),
+                "return_embeddings": bool(
+                    input_data.get('return_embeddings', False))}
     raise ValueError(f"Unsupported content type: {request_content_type}")
 
 
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonlines")
+NPZ_CONTENT_TYPE = "application/x-npz"
+
+
 def output_fn(prediction, response_content_type):
+    # A streaming prediction is a generator of utterances, or of per-video
+    # results for a batch request
     if response_content_type == "application/json":
-        return json.dumps(prediction)
+        if not isinstance(prediction, dict):
+            items = list(prediction)
+            key = "results" if items and "video_path" in items[0] else "utterances"
+            prediction = {key: items}
+        key = "results" if "results" in prediction else "utterances"
+        return encode_json({**prediction, key: [
+            strip_fields(item) for item in prediction[key]]})
+    if response_content_type in NDJSON_CONTENT_TYPES:
+        # The model server only sends str or bytes, a streamed prediction
+        # is collected here. serve_local uses iter_ndjson to send chunks.
+        return b"".join(iter_ndjson(prediction))
+    if response_content_type == NPZ_CONTENT_TYPE:
+        # Full probability vectors, a streamed prediction is collected first
+        if isinstance(prediction, dict):
+            prediction = prediction.get("results", prediction.get("utterances"))
+        return encode_npz(list(prediction),
+                          [EMOTION_MAP[i] for i in range(len(EMOTION_MAP))],
+                          [SENTIMENT_MAP[i] for i in range(len(SENTIMENT_MAP))])
     raise ValueError(f"Unsupported content type: {response_content_type}")
 
 
-def model_fn(model_dir):
-    # Load the model for inference
-    if not install_ffmpeg():
-        raise RuntimeError(
-            "FFmpeg installation failed - required for inference")
+def iter_ndjson(prediction):
+    # One encoded line per utterance, or per video for a batch request.
+    # Closing the generator stops the prediction and releases its video.
+    if isinstance(prediction, dict):
+        prediction = prediction.get("results", prediction.get("utterances"))
+    try:
+        for item in prediction:
+            yield encode_json(strip_fields(item)) + b"\n"
+    finally:
+        if hasattr(prediction, "close"):
+            prediction.close()
 
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    model = MultimodalSentimentModel().to(device)
+
+def load_model(model_dir, device):
+    # Every weight comes from model.pth, skip the pretrained downloads
+    model = MultimodalSentimentModel(pretrained=False).to(device)
 
     model_path = os.path.join(model_dir, 'model.pth')
     if not os.path.exists(model_path):
@@ -237,85 +192,500 @@ def model_fn(model_dir):
         model_path, map_location=device, weights_only=True))
     model.eval()
 
+    return model
+
+
+def model_fn(model_dir):
+    # Load the model for inference. Nothing is installed or downloaded at
+    # cold start: ffmpeg must already be in the image, and each phase is
+    # timed so slow starts show up in the endpoint logs.
+    timer = PhaseTimer()
+    timer.record("imports", IMPORT_SECONDS)
+    with timer.phase("ffmpeg preflight"):
+        preflight_ffmpeg()
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    # INFERENCE_BACKEND=onnx serves model.onnx with ONNX Runtime, otherwise
+    # prefer the TorchScript artifact written by export_model.py
+    backend = os.environ.get("INFERENCE_BACKEND", "pytorch")
+    exported_path = find_exported_model(model_dir)
+    with timer.phase("model load"):
+        if backend == "onnx":
+            model = load_onnx_model(model_dir)
+        elif exported_path is not None:
+            model = load_exported_model(exported_path, device)
+        else:
+            model = load_model(model_dir, device)
+
+    # Opt-in int8 serving on CPU, see quantization_report.py for fidelity
+    quantized = False
+    if (backend != "onnx" and exported_path is None and device.type == "cpu"
+            and os.environ.get("QUANTIZED_INFERENCE", "0") == "1"):
+        with timer.phase("quantization"):
+            calibration = load_calibration(model_dir)
+            if calibration is None:
+                print("No video calibration found, quantizing linear layers only")
+            model = quantize_model(model, calibration)
+        quantized = True
+        print("Serving int8 quantized model")
+
+    # Exported artifacts take token ids, only the eager model can be fed
+    # cached BERT pooler outputs or skip encoders
+    text_cache = None
+    skip_stats = None
+    if isinstance(model, MultimodalSentimentModel):
+        text_cache = TextEmbeddingCache(
+            max_size=int(os.environ.get("TEXT_CACHE_SIZE", "10000")),
+            path=os.environ.get("TEXT_CACHE_PATH"),
+            tag="bert-base-uncased-int8" if quantized else "bert-base-uncased")
+
+        # Opt-in: skip BERT for segments without words and r3d_18 for
+        # near-static video, see gating_report.py for the accuracy impact
+        if os.environ.get("MODALITY_GATING", "0") == "1":
+            skip_stats = SkipStats()
+
+    with timer.phase("tokenizer"):
+        tokenizer = load_tokenizer(model_dir)
+
+    # Whisper weights shipped in model_dir/whisper are used as is, otherwise
+    # they come from the local whisper cache baked into the image
+    whisper_dir = os.path.join(model_dir, "whisper")
+    with timer.phase("whisper"):
+        transcriber = whisper.load_model(
+            os.environ.get("WHISPER_MODEL", "base"),
+            device="cpu" if device.type == "cpu" else device,
+            download_root=whisper_dir if os.path.isdir(whisper_dir) else None
+        )
+
+    print(f"Cold start total: {timer.total():.2f}s")
+
     return {
         'model': model,
-        'tokenizer': AutoTokenizer.from_pretrained('bert-base-uncased'),
-        'transcriber': whisper.load_model(
-            "base",
-            device="cpu" if device.type == "cpu" else device,
-        ),
+        'tokenizer': tokenizer,
+        'text_cache': text_cache,
+        'skip_stats': skip_stats,
+        'motion_threshold': float(os.environ.get(
+            "VIDEO_MOTION_THRESHOLD", MOTION_THRESHOLD)),
+        'transcriber': transcriber,
         'device': device
     }
 
 
-def predict_fn(input_data, model_dict):
+def prepare_segment(utterance_processor, video_path, segment, temp_dir):
+    # CPU side of one segment: ffmpeg cut, frame decode and mel features.
+    # ffmpeg, OpenCV and torch release the GIL, so segments prepare in
+    # parallel on a thread pool.
+    segment_path = utterance_processor.extract_segment(
+        video_path,
+        segment["start"],
+        segment["end"],
+        temp_dir
+    )
+
+    try:
+        return {
+            'video_frames': utterance_processor.video_processor.process_video(
+                segment_path),
+            'audio_features': utterance_processor.audio_processor.extract_features(
+                segment_path)
+        }
+    finally:
+        # Cleanup
+        if os.path.exists(segment_path):
+            os.remove(segment_path)
+
+
+# One video's frames and audio, decoded once and shared by all of its
+# segments instead of cutting a clip per segment with ffmpeg
+class SegmentMedia:
+    def __init__(self, video_path, profile, max_bytes):
+        self.profile = profile
+        self.waveform = load_audio_waveform(video_path)
+        self.frames = FrameBuffer(video_path, profile['size'], max_bytes)
+
+    def prepare(self, segment):
+        return {
+            'video_frames': self.frames.segment_frames(
+                segment["start"], segment["end"],
+                self.profile['num_frames'], self.profile['stride']),
+            'audio_features': segment_audio_features(
+                self.waveform, segment["start"], segment["end"])
+        }
+
+    def close(self):
+        self.frames.close()
+
+
+def open_segment_media(video_path, utterance_processor):
+    # FRAME_CACHE=0 goes back to one ffmpeg cut per segment
+    if os.environ.get("FRAME_CACHE", "1") != "1":
+        return None
+    return SegmentMedia(
+        video_path, utterance_processor.video_processor.profile,
+        int(os.environ.get("FRAME_CACHE_MB", "512")) * 1024 * 1024)
+
+
+def prep_limits():
+    # Worker threads and segments in flight, at least one of each. A zero
+    # queue size would never submit a segment and drop the whole request.
+    max_workers = max(1, int(os.environ.get(
+        "PREP_WORKERS", min(8, os.cpu_count() or 1))))
+    max_in_flight = max(1, int(os.environ.get(
+        "PREP_QUEUE_SIZE", 2 * max_workers)))
+    return max_workers, max_in_flight
+
+
+def prepared_segments(segments, prepare, max_workers, max_in_flight):
+    # Yields (segment, features, error) in order. At most max_in_flight
+    # segments are being prepared or waiting for the model at any time.
+    segments = iter(segments)
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for segment in itertools.islice(segments, max_in_flight):
+            pending.append((segment, pool.submit(prepare, segment)))
+
+        while pending:
+            segment, future = pending.popleft()
+            next_segment = next(segments, None)
+            if next_segment is not None:
+                pending.append((next_segment, pool.submit(prepare, next_segment)))
+
+            try:
+                yield segment, future.result(), None
+            except Exception as e:
+                yield segment, None, e
+
+
+def predict_batch(model_dict, segments, features, return_embeddings=False):
+    # One model call for a list of prepared segments, which may come from
+    # different videos. Returns one prediction per segment, in order.
     model = model_dict['model']
     tokenizer = model_dict['tokenizer']
     device = model_dict['device']
-    video_path = input_data['video_path']
-
-    result = model_dict['transcriber'].transcribe(
-        video_path, word_timestamps=True)
+    texts = [segment["text"] for segment in segments]
+    video_frames = torch.stack([f['video_frames'] for f in features])
+    audio_features = torch.stack([f['audio_features'] for f in features])
+
+    gates = {}
+    if return_embeddings:
+        gates['return_embeddings'] = True
+    skip_text = None
+    if model_dict.get('skip_stats') is not None:
+        skip_text, skip_video = skip_masks(
+            texts, video_frames, model_dict['motion_threshold'])
+        model_dict['skip_stats'].update(skip_text, skip_video)
+        gates.update({'skip_text': skip_text.to(device),
+                      'skip_video': skip_video.to(device)})
+
+    # Tokenizing stays on this thread, fast tokenizers are not safe to share
+    # across threads
+    if model_dict.get('text_cache') is not None:
+        # Skipped rows never reach the encoder, zeros stand in for them
+        keep = [i for i in range(len(texts))
+                if skip_text is None or not skip_text[i]]
+        pooled = torch.zeros(len(texts),
+                             model.text_encoder.bert.config.hidden_size,
+                             device=device)
+        if keep:
+            pooled[keep] = model_dict['text_cache'].encode(
+                model.text_encoder, tokenizer, [texts[i] for i in keep], device)
+        text_inputs = {'pooler_output': pooled}
+    else:
+        text_inputs = tokenize_utterance(tokenizer, texts)
+
+    # Move to device
+    text_inputs = {k: v.to(device) for k, v in text_inputs.items()}
+    video_frames = video_frames.to(device)
+    audio_features = audio_features.to(device)
+
+    # Get predictions
+    with torch.inference_mode():
+        outputs = model(text_inputs, video_frames, audio_features, **gates)
+        emotion_probs = torch.softmax(outputs["emotions"], dim=1)
+        sentiment_probs = torch.softmax(outputs["sentiments"], dim=1)
+
+        emotion_values, emotion_indices = torch.topk(emotion_probs, 3)
+        sentiment_values, sentiment_indices = torch.topk(
+            sentiment_probs, 3)
+
+    # Rows of one array per batch, no copy per prediction
+    emotion_probs = emotion_probs.float().cpu().numpy()
+    sentiment_probs = sentiment_probs.float().cpu().numpy()
+    embeddings = {}
+    if return_embeddings:
+        embeddings = {name: outputs[f"{name}_features"].float().cpu().numpy()
+                      for name in EMBEDDING_NAMES}
 
-    utterance_processor = VideoUtteranceProcessor()
     predictions = []
+    for i, segment in enumerate(segments):
+        prediction = {
+            "start_time": segment["start"],
+            "end_time": segment["end"],
+            "text": segment["text"],
+            "emotions": [
+                {"label": EMOTION_MAP[idx.item()], "confidence": conf.item()} for idx, conf in zip(emotion_indices[i], emotion_values[i])
+            ],
+            "sentiments": [
+                {"label": SENTIMENT_MAP[idx.item()], "confidence": conf.item()} for idx, conf in zip(sentiment_indices[i], sentiment_values[i])
+            ],
+            "emotion_probs": emotion_probs[i],
+            "sentiment_probs": sentiment_probs[i]
+        }
+        for name, values in embeddings.items():
+            prediction[f"{name}_embedding"] = values[i]
+        if "words" in segment:
+            prediction["words"] = segment["words"]
+        predictions.append(prediction)
+
+    return predictions
+
+
+def predict_segment(model_dict, segment, features, return_embeddings=False):
+    return predict_batch(model_dict, [segment], [features],
+                         return_embeddings)[0]
+
+
+def predict_stream(input_data, model_dict):
+    # Yields each utterance as soon as it is predicted
+    video_path = input_data['video_path']
+    utterance_processor = VideoUtteranceProcessor()
 
-    for segment in result["segments"]:
-        try:
-            segment_path = utterance_processor.extract_segment(
-                video_path,
-                segment["start"],
-                segment["end"]
-            )
+    # Segments are prepared on worker threads while the model runs on
+    # earlier ones
+    max_workers, max_in_flight = prep_limits()
 
-            video_frames = utterance_processor.video_processor.process_video(
-                segment_path)
-            audio_features = utterance_processor.audio_processor.extract_features(
-                segment_path)
-            text_inputs = tokenizer(
-                segment["text"],
-                padding="max_length",
-                truncation=True,
-                max_length=128,
-                return_tensors="pt"
-            )
-
-            # Move to device
-            text_inputs = {k: v.to(device) for k, v in text_inputs.items()}
-            video_frames = video_frames.unsqueeze(0).to(device)
-            audio_features = audio_features.unsqueeze(0).to(device)
-
-            # Get predictions
-            with torch.inference_mode():
-                outputs = model(text_inputs, video_frames, audio_features)
-                emotion_probs = torch.softmax(outputs["emotions"], dim=1)[0]
-                sentiment_probs = torch.softmax(
-                    outputs["sentiments"], dim=1)[0]
-
-                emotion_values, emotion_indices = torch.topk(emotion_probs, 3)
-                sentiment_values, sentiment_indices = torch.topk(
-                    sentiment_probs, 3)
-
-            predictions.append({
-                "start_time": segment["start"],
-                "end_time": segment["end"],
-                "text": segment["text"],
-                "emotions": [
-                    {"label": EMOTION_MAP[idx.item()], "confidence": conf.item()} for idx, conf in zip(emotion_indices, emotion_values)
-                ],
-                "sentiments": [
-                    {"label": SENTIMENT_MAP[idx.item()], "confidence": conf.item()} for idx, conf in zip(sentiment_indices, sentiment_values)
-                ]
-            })
+    media = None
+    try:
+        media = open_segment_media(video_path, utterance_processor)
+
+        # VAD first, then batched whisper decoding of the speech chunks only.
+        # Word timestamps cost a sequential alignment pass, so they are opt-in.
+        segments = iter_segments(
+            model_dict['transcriber'], video_path,
+            batch_size=int(os.environ.get("ASR_BATCH_SIZE", "8")),
+            word_timestamps=os.environ.get("WORD_TIMESTAMPS", "0") == "1",
+            language=os.environ.get("WHISPER_LANGUAGE"),
+            waveform=media.waveform if media is not None else None)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            if media is not None:
+                prepare = media.prepare
+            else:
+                prepare = functools.partial(prepare_segment, utterance_processor,
+                                            video_path, temp_dir=temp_dir)
+
+            for segment, features, error in prepared_segments(
+                    segments, prepare, max_workers, max_in_flight):
+                try:
+                    if error is not None:
+                        raise error
+                    prediction = predict_segment(
+                        model_dict, segment, features,
+                        input_data.get('return_embeddings', False))
+                except Exception as e:
+                    print("Segment failed inference: " + str(e))
+                    continue
+                yield prediction
+    finally:
+        if media is not None:
+            media.close()
+        release_video(input_data)
+
+    if model_dict.get('text_cache') is not None:
+        print(f"Text embedding cache: {model_dict['text_cache'].stats()}")
+    if model_dict.get('skip_stats') is not None:
+        print(f"Encoder skips: {model_dict['skip_stats'].rates()}")
+
+
+def resolve_video(video_path, allow_local_paths=False):
+    # Local path for one batch item, S3 objects go through the video cache.
+    # Same rule as input_fn for local paths.
+    if video_path.startswith("s3://"):
+        return download_from_s3(video_path)
+    if not allow_local_paths:
+        raise ValueError("video_path must be an s3:// URI")
+    if not os.path.exists(video_path):
+        raise ValueError(f"Video not found: {video_path}")
+    return video_path
+
+
+def predict_videos(input_data, model_dict):
+    # Batch request over many videos with one set of model weights. Videos
+    # download ahead on a small pool, whisper runs one video at a time (its
+    # decoder hooks are not safe to share across threads), segments from
+    # every video prepare on the shared thread pool, and utterances from
+    # consecutive videos are packed into common model batches. Yields one
+    # result per video, in input order, as soon as the video is finished.
+    video_paths = input_data['video_paths']
+    batch_size = int(os.environ.get("MODEL_BATCH_SIZE", "16"))
+    max_workers, max_in_flight = prep_limits()
+    prefetch = max(1, int(os.environ.get("VIDEO_PREFETCH", "2")))
 
+    utterance_processor = VideoUtteranceProcessor()
+    results = [{"video_path": path, "utterances": []} for path in video_paths]
+    local_paths = [None] * len(video_paths)
+    media = [None] * len(video_paths)
+    # Segments handed out but not yet predicted, and whether whisper is
+    # done with the video
+    pending = [0] * len(video_paths)
+    transcribed = [False] * len(video_paths)
+    finished = 0
+
+    def resolve(index):
+        # Recorded on the prefetch thread, so a video pinned ahead of the
+        # main loop is still released if the caller stops early
+        local_paths[index] = resolve_video(
+            video_paths[index], input_data.get('allow_local_paths', False))
+        return local_paths[index]
+
+    def segment_failed(index, error):
+        # The video keeps its other utterances, the first failure is reported
+        print("Segment failed inference: " + str(error))
+        results[index].setdefault("error", str(error))
+
+    def video_segments():
+        resolved = prepared_segments(range(len(video_paths)), resolve,
+                                     prefetch, prefetch)
+        try:
+            yield from transcribed_segments(resolved)
+        finally:
+            # Waits for downloads still in flight
+            resolved.close()
+
+    def transcribed_segments(resolved):
+        for index, local_path, error in resolved:
+            if error is not None:
+                results[index]["error"] = str(error)
+                transcribed[index] = True
+                continue
+
+            try:
+                media[index] = open_segment_media(local_path, utterance_processor)
+                for segment in iter_segments(
+                        model_dict['transcriber'], local_path,
+                        batch_size=int(os.environ.get("ASR_BATCH_SIZE", "8")),
+                        word_timestamps=os.environ.get(
+                            "WORD_TIMESTAMPS", "0") == "1",
+                        language=os.environ.get("WHISPER_LANGUAGE"),
+                        waveform=media[index].waveform
+                        if media[index] is not None else None):
+                    pending[index] += 1
+                    yield index, segment
+            except Exception as e:
+                results[index]["error"] = str(e)
+            transcribed[index] = True
+
+    def close_video(index):
+        if media[index] is not None:
+            media[index].close()
+            media[index] = None
+        if video_paths[index].startswith("s3://") \
+                and local_paths[index] is not None:
+            get_video_cache().release(local_paths[index])
+            local_paths[index] = None
+
+    def finish_videos():
+        nonlocal finished
+        while (finished < len(video_paths) and transcribed[finished]
+               and pending[finished] == 0):
+            close_video(finished)
+            yield results[finished]
+            results[finished] = None
+            finished += 1
+
+    def predict_items(batch):
+        return predict_batch(model_dict,
+                             [segment for _, segment, _ in batch],
+                             [features for _, _, features in batch],
+                             input_data.get('return_embeddings', False))
+
+    def run_batch(batch):
+        try:
+            predictions = predict_items(batch)
         except Exception as e:
-            print("Segment failed inference: " + str(e))
+            # Retry one segment at a time, only the segments that fail on
+            # their own are dropped and reported on their video
+            print("Batch failed inference, retrying per segment: " + str(e))
+            predictions = []
+            for item in batch:
+                try:
+                    predictions.extend(predict_items([item]))
+                except Exception as e:
+                    segment_failed(item[0], e)
+                    predictions.append(None)
+
+        for (index, _, _), prediction in zip(batch, predictions):
+            pending[index] -= 1
+            if prediction is not None:
+                results[index]["utterances"].append(prediction)
+
+    segments = prepared = None
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Segment files are named by time, one directory per video
+            def prepare(item):
+                index, segment = item
+                if media[index] is not None:
+                    return media[index].prepare(segment)
+                return prepare_segment(utterance_processor, local_paths[index],
+                                       segment,
+                                       os.path.join(temp_dir, str(index)))
+
+            batch = []
+            segments = video_segments()
+            prepared = prepared_segments(segments, prepare, max_workers,
+                                         max_in_flight)
+            for (index, segment), features, error in prepared:
+                if error is not None:
+                    segment_failed(index, error)
+                    pending[index] -= 1
+                else:
+                    batch.append((index, segment, features))
+
+                if len(batch) >= batch_size:
+                    run_batch(batch)
+                    batch = []
+                yield from finish_videos()
+
+            if batch:
+                run_batch(batch)
+            yield from finish_videos()
+    finally:
+        # Anything still open or pinned when the caller stops early. The
+        # pools are shut down first so no download finishes after this.
+        if segments is not None:
+            prepared.close()
+            segments.close()
+        for index in range(finished, len(video_paths)):
+            close_video(index)
+
+    if model_dict.get('text_cache') is not None:
+        print(f"Text embedding cache: {model_dict['text_cache'].stats()}")
+    if model_dict.get('skip_stats') is not None:
+        print(f"Encoder skips: {model_dict['skip_stats'].rates()}")
 
-        finally:
-            # Cleanup
-            if os.path.exists(segment_path):
-                os.remove(segment_path)
-    return {"utterances": predictions}
+
+def predict_fn(input_data, model_dict):
+    # With "stream": true the utterances are produced lazily, pair it with
+    # an ndjson accept type so serve_local sends them one line at a time
+    # (iter_ndjson). Batch requests stream one line per video.
+    if (input_data.get('return_embeddings')
+            and not isinstance(model_dict['model'], MultimodalSentimentModel)):
+        # Exported TorchScript and ONNX graphs only output the logits
+        release_video(input_data)
+        raise ValueError("return_embeddings needs the PyTorch model, "
+                         "unset INFERENCE_BACKEND and remove model.ts")
+
+    if 'video_paths' in input_data:
+        if input_data.get('stream'):
+            return predict_videos(input_data, model_dict)
+        return {"results": list(predict_videos(input_data, model_dict))}
+
+    if input_data.get('stream'):
+        return predict_stream(input_data, model_dict)
+    return {"utterances": list(predict_stream(input_data, model_dict))}
 
 
 def process_local_video(video_path, model_dir="model"):
@@ -0,0 +1,84 @@
+import os
+import torch
+from torchscript_model import ExportWrapper
+
+ONNX_MODEL_FILE = 'model.onnx'
+
+INPUT_NAMES = ['input_ids', 'attention_mask', 'video_frames', 'audio_features']
+OUTPUT_NAMES = ['emotions', 'sentiments']
+
+DYNAMIC_AXES = {
+    'input_ids': {0: 'batch', 1: 'sequence'},
+    'attention_mask': {0: 'batch', 1: 'sequence'},
+    # r3d_18 ends in an adaptive pool, so frame count and size can vary too
+    'video_frames': {0: 'batch', 1: 'frames', 3: 'height', 4: 'width'},
+    'audio_features': {0: 'batch'},
+    'emotions': {0: 'batch'},
+    'sentiments': {0: 'batch'}
+}
+
+
+def export_onnx(model, path, example_inputs, opset_version=17):
+    wrapper = ExportWrapper(model).eval()
+
+    with torch.no_grad():
+        torch.onnx.export(wrapper, example_inputs, path,
+                          input_names=INPUT_NAMES,
+                          output_names=OUTPUT_NAMES,
+                          dynamic_axes=DYNAMIC_AXES,
+                          opset_version=opset_version)
+
+
+def find_onnx_model(model_dir):
+    for path in (os.path.join(model_dir, ONNX_MODEL_FILE),
+                 os.path.join(model_dir, 'model', ONNX_MODEL_FILE)):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+# Same call signature as MultimodalSentimentModel, backed by an ONNX Runtime
+# session. Thread counts of 0 leave the choice to ONNX Runtime.
+class OnnxSentimentModel:
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        options.inter_op_num_threads = inter_op_threads
+        if inter_op_threads > 1:
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        providers = [provider for provider in ('CUDAExecutionProvider',
+                                               'CPUExecutionProvider')
+                     if provider in ort.get_available_providers()]
+
+        print("Loading ONNX model from path: " + path)
+        self.session = ort.InferenceSession(path, options, providers=providers)
+
+    def forward(self, input_ids, attention_mask, video_frames, audio_features):
+        inputs = (input_ids, attention_mask, video_frames, audio_features)
+        outputs = self.session.run(OUTPUT_NAMES, {
+            name: tensor.detach().cpu().numpy()
+            for name, tensor in zip(INPUT_NAMES, inputs)})
+
+        return tuple(torch.from_numpy(output) for output in outputs)
+
+    def __call__(self, text_inputs, video_frames, audio_features):
+        emotions, sentiments = self.forward(text_inputs['input_ids'],
+                                            text_inputs['attention_mask'],
+                                            video_frames, audio_features)
+        return {'emotions': emotions, 'sentiments': sentiments}
+
+
+def load_onnx_model(model_dir):
+    path = find_onnx_model(model_dir)
+    if path is None:
+        raise FileNotFoundError(
+            "ONNX model not found in path " + model_dir)
+
+    return OnnxSentimentModel(
+        path,
+        intra_op_threads=int(os.environ.get("ORT_INTRA_OP_THREADS", "0")),
+        inter_op_threads=int(os.environ.get("ORT_INTER_OP_THREADS", "0")))
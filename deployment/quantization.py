@@ -0,0 +1,108 @@
+import os
+import warnings
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+# r3d_18 stages quantized statically, each one gets its own quant/dequant
+# boundary so the rest of VideoEncoder.extract_features stays unchanged
+VIDEO_STAGES = ('stem', 'layer1', 'layer2', 'layer3', 'layer4')
+
+CALIBRATION_FILE = 'video_quant_calibration.pt'
+
+
+def static_quantization_supported():
+    # Quantized Conv3d kernels only exist in the x86 / fbgemm backends
+    return any(engine in torch.backends.quantized.supported_engines
+               for engine in ('x86', 'fbgemm'))
+
+
+def _qconfig_mapping():
+    engine = 'x86' if 'x86' in torch.backends.quantized.supported_engines else 'fbgemm'
+    torch.backends.quantized.engine = engine
+    return get_default_qconfig_mapping(engine)
+
+
+def prepare_video_encoder(model):
+    # Swap the r3d_18 stages for FX modules with observers. The model must be
+    # in eval mode so Conv3d + BatchNorm3d + ReLU are folded together.
+    backbone = model.video_encoder.backbone
+    qconfig_mapping = _qconfig_mapping()
+
+    # Only the channel count matters for tracing, keep the clip tiny
+    x = torch.zeros(1, 3, 4, 32, 32)
+    with warnings.catch_warnings(), torch.no_grad():
+        warnings.simplefilter('ignore')
+        for name in VIDEO_STAGES:
+            stage = getattr(backbone, name)
+            prepared = prepare_fx(stage, qconfig_mapping, (x,))
+            x = stage(x)
+            setattr(backbone, name, prepared)
+
+    return model
+
+
+def calibration_state(model):
+    # Observer statistics of a prepared video encoder, small enough to ship
+    # next to model.pth
+    backbone = model.video_encoder.backbone
+    return {name: {k: v for k, v in getattr(backbone, name).state_dict().items()
+                   if 'activation_post_process' in k}
+            for name in VIDEO_STAGES}
+
+
+def convert_video_encoder(model, calibration=None):
+    backbone = model.video_encoder.backbone
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for name in VIDEO_STAGES:
+            stage = getattr(backbone, name)
+            if calibration is not None:
+                stage.load_state_dict(calibration[name], strict=False)
+            setattr(backbone, name, convert_fx(stage))
+
+    return model
+
+
+def calibrate_video_encoder(model, batches):
+    # batches: video frames [batch_size, frames, channels, height, width]
+    prepare_video_encoder(model)
+    # no_grad rather than inference_mode, convert_fx rebuilds parameters
+    # from the fused weights
+    with torch.no_grad():
+        for video_frames in batches:
+            model.video_encoder.extract_features(video_frames)
+
+    calibration = calibration_state(model)
+    convert_video_encoder(model)
+
+    return calibration
+
+
+def quantize_dynamic_linear(model):
+    # int8 weights for every nn.Linear: the BERT encoder layers and the
+    # projection, fusion and classifier heads. Activations are quantized on
+    # the fly, no calibration needed.
+    return torch.ao.quantization.quantize_dynamic(
+        model, {nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def quantize_model(model, calibration=None):
+    # CPU only. The model must be in eval mode with its weights loaded.
+    if calibration is not None:
+        if static_quantization_supported():
+            prepare_video_encoder(model)
+            convert_video_encoder(model, calibration)
+        else:
+            print("Static int8 Conv3d not supported here, video encoder stays fp32")
+
+    return quantize_dynamic_linear(model)
+
+
+def load_calibration(model_dir):
+    for path in (os.path.join(model_dir, CALIBRATION_FILE),
+                 os.path.join(model_dir, 'model', CALIBRATION_FILE)):
+        if os.path.exists(path):
+            return torch.load(path, map_location='cpu', weights_only=True)
+    return None
@@ -0,0 +1,96 @@
+import argparse
+import copy
+import io
+import json
+import os
+import torch
+from transformers import AutoTokenizer
+from inference import load_model
+from dev_eval import load_dev_samples, predict_samples, agreement, percentile
+from quantization import (calibrate_video_encoder, quantize_dynamic_linear,
+                          static_quantization_supported, CALIBRATION_FILE)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--dev-csv", type=str,
+                        default="../dataset/dev/dev_sent_emo.csv")
+    parser.add_argument("--dev-video-dir", type=str,
+                        default="../dataset/dev/dev_splits_complete")
+    parser.add_argument("--max-samples", type=int, default=None)
+    parser.add_argument("--calibration-samples", type=int, default=32)
+    parser.add_argument("--output", type=str, default=None)
+
+    return parser.parse_args()
+
+
+def serialized_size(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell()
+
+
+def summarize(predictions, samples, model):
+    latencies = predictions['latencies']
+    return {
+        'emotion_accuracy': agreement(
+            predictions['emotions'], [s['emotion_label'] for s in samples]),
+        'sentiment_accuracy': agreement(
+            predictions['sentiments'], [s['sentiment_label'] for s in samples]),
+        'latency_mean_ms': 1000 * sum(latencies) / max(len(latencies), 1),
+        'latency_p50_ms': 1000 * percentile(latencies, 50),
+        'latency_p95_ms': 1000 * percentile(latencies, 95),
+        'model_size_mb': serialized_size(model) / 1024 ** 2
+    }
+
+
+def main():
+    args = parse_args()
+    device = torch.device("cpu")
+
+    fp32_model = load_model(args.model_dir, device)
+    tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
+
+    samples = load_dev_samples(args.dev_csv, args.dev_video_dir, tokenizer,
+                               max_samples=args.max_samples)
+    if not samples:
+        raise ValueError(f"No dev samples found in {args.dev_video_dir}")
+    print(f"Loaded {len(samples)} dev utterances")
+
+    int8_model = copy.deepcopy(fp32_model)
+    if static_quantization_supported():
+        calibration = calibrate_video_encoder(
+            int8_model,
+            [s['video_frames'] for s in samples[:args.calibration_samples]])
+
+        # model_fn picks the calibration up from the model directory
+        calibration_path = os.path.join(args.model_dir, CALIBRATION_FILE)
+        torch.save(calibration, calibration_path)
+        print(f"Saved video calibration to {calibration_path}")
+    else:
+        print("Static int8 Conv3d not supported here, video encoder stays fp32")
+    quantize_dynamic_linear(int8_model)
+
+    fp32_predictions = predict_samples(fp32_model, samples)
+    int8_predictions = predict_samples(int8_model, samples)
+
+    report = {
+        'num_samples': len(samples),
+        'emotion_agreement': agreement(fp32_predictions['emotions'],
+                                       int8_predictions['emotions']),
+        'sentiment_agreement': agreement(fp32_predictions['sentiments'],
+                                         int8_predictions['sentiments']),
+        'fp32': summarize(fp32_predictions, samples, fp32_model),
+        'int8': summarize(int8_predictions, samples, int8_model)
+    }
+
+    print(json.dumps(report, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
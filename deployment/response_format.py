@@ -0,0 +1,71 @@
+import io
+import json
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Full softmax outputs carried on each prediction next to the top-3 lists.
+# Only the binary format writes them, JSON keeps its original shape.
+PROBABILITY_FIELDS = ("emotion_probs", "sentiment_probs")
+# Present when the request sets return_embeddings, written by both formats
+EMBEDDING_FIELDS = ("text_embedding", "video_embedding", "audio_embedding",
+                    "fused_embedding")
+
+
+def strip_fields(item, fields=PROBABILITY_FIELDS):
+    # Prediction, or a per-video batch result holding predictions
+    if "utterances" in item:
+        return {**item, "utterances": [strip_fields(utterance, fields)
+                                       for utterance in item["utterances"]]}
+    return {k: v for k, v in item.items() if k not in fields}
+
+
+def encode_json(obj):
+    # orjson is several times faster than json.dumps on the nested
+    # prediction lists and returns bytes directly. Embeddings are numpy
+    # rows and go out as lists.
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=lambda value: value.tolist()).encode("utf-8")
+
+
+def encode_npz(items, emotion_labels, sentiment_labels):
+    # One .npz with the full probability vectors as float32 arrays, no
+    # float to text conversion. items are predictions, or per-video batch
+    # results, in which case video_index maps each utterance to its entry
+    # in video_paths and errors is "" for videos that succeeded.
+    arrays = {"emotion_labels": np.array(emotion_labels),
+              "sentiment_labels": np.array(sentiment_labels)}
+
+    if items and "video_path" in items[0]:
+        arrays["video_paths"] = np.array([r["video_path"] for r in items])
+        arrays["errors"] = np.array([r.get("error", "") for r in items])
+        arrays["video_index"] = np.array(
+            [i for i, r in enumerate(items) for _ in r["utterances"]],
+            dtype=np.int32)
+        utterances = [u for r in items for u in r["utterances"]]
+    else:
+        utterances = items
+
+    arrays["start_time"] = np.array(
+        [u["start_time"] for u in utterances], dtype=np.float64)
+    arrays["end_time"] = np.array(
+        [u["end_time"] for u in utterances], dtype=np.float64)
+    # Fixed width unicode, loads without allow_pickle
+    arrays["text"] = np.array([u["text"] for u in utterances], dtype=str)
+    arrays["emotion_probs"] = np.array(
+        [u["emotion_probs"] for u in utterances], dtype=np.float32).reshape(
+            len(utterances), len(emotion_labels))
+    arrays["sentiment_probs"] = np.array(
+        [u["sentiment_probs"] for u in utterances], dtype=np.float32).reshape(
+            len(utterances), len(sentiment_labels))
+    for name in EMBEDDING_FIELDS:
+        if utterances and name in utterances[0]:
+            arrays[name] = np.stack([u[name] for u in utterances])
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
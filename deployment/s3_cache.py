@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.config import Config
+
+PART_SIZE = 8 * 1024 * 1024
+READ_SIZE = 1024 * 1024
+
+_client = None
+_client_lock = threading.Lock()
+_cache = None
+
+
+def get_s3_client():
+    # One client per process. boto3 clients are thread-safe and keep a pool
+    # of connections, so repeat requests skip the TCP and TLS handshakes.
+    # S3_ENDPOINT_URL points at an S3-compatible service such as MinIO.
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = boto3.client(
+                "s3",
+                endpoint_url=os.environ.get("S3_ENDPOINT_URL"),
+                config=Config(
+                    max_pool_connections=int(
+                        os.environ.get("S3_MAX_CONNECTIONS", "16")),
+                    retries={"max_attempts": 5, "mode": "adaptive"},
+                    s3={"addressing_style": os.environ.get(
+                        "S3_ADDRESSING_STYLE", "auto")}))
+        return _client
+
+
+def parse_s3_uri(s3_uri):
+    bucket = s3_uri.split("/")[2]
+    key = "/".join(s3_uri.split("/")[3:])
+    return bucket, key
+
+
+def download_object(client, bucket, key, path, size, etag=None,
+                    part_size=PART_SIZE, max_workers=4):
+    # Ranged GETs in parallel, each streamed to its offset in the file so
+    # no part is held in memory. IfMatch fails the download if the object
+    # changes half way through.
+    extra = {"IfMatch": etag} if etag else {}
+
+    def fetch_part(start):
+        end = min(start + part_size, size) - 1
+        response = client.get_object(Bucket=bucket, Key=key,
+                                     Range=f"bytes={start}-{end}", **extra)
+        offset = start
+        for chunk in response["Body"].iter_chunks(READ_SIZE):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+        if offset != end + 1:
+            raise IOError(f"Short read for s3://{bucket}/{key} at {start}")
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        starts = range(0, size, part_size)
+        if len(starts) <= 1:
+            for start in starts:
+                fetch_part(start)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(fetch_part, starts))
+    finally:
+        os.close(fd)
+
+
+# Downloaded S3 objects on local disk, keyed on URI and ETag so an
+# overwritten object is fetched again. Least recently used files are
+# evicted once the total size passes max_bytes. Files handed out by
+# acquire() are pinned until release() so eviction never removes a video
+# a request is still reading.
+class S3VideoCache:
+    def __init__(self, cache_dir, max_bytes, client=None, max_workers=4,
+                 part_size=PART_SIZE):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.client = client
+        self.max_workers = max_workers
+        self.part_size = part_size
+        self.entries = OrderedDict()
+        self.pins = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.load()
+
+    def load(self):
+        # Pick up files from a previous process, oldest first. Leftover
+        # partial downloads are removed.
+        files = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".part"):
+                os.remove(path)
+            elif os.path.isfile(path):
+                files.append((os.path.getmtime(path), name, os.path.getsize(path)))
+
+        for _, name, size in sorted(files):
+            self.entries[name] = size
+        with self.lock:
+            self.evict()
+
+    def total_bytes(self):
+        return sum(self.entries.values())
+
+    def stats(self):
+        with self.lock:
+            return {"files": len(self.entries), "bytes": self.total_bytes(),
+                    "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+    def cache_name(self, s3_uri, etag):
+        digest = hashlib.sha256(f"{s3_uri}\0{etag}".encode("utf-8")).hexdigest()
+        return digest + os.path.splitext(s3_uri)[1]
+
+    def acquire(self, s3_uri):
+        client = self.client or get_s3_client()
+        bucket, key = parse_s3_uri(s3_uri)
+        head = client.head_object(Bucket=bucket, Key=key)
+        etag = head["ETag"]
+        name = self.cache_name(s3_uri, etag)
+        path = os.path.join(self.cache_dir, name)
+
+        with self.lock:
+            if name in self.entries:
+                self.entries.move_to_end(name)
+                self.pins[name] = self.pins.get(name, 0) + 1
+                self.hits += 1
+                os.utime(path)
+                return path
+            self.misses += 1
+
+        # Concurrent misses on the same object each write their own part
+        # file, the last rename wins and both are identical
+        part_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            download_object(client, bucket, key, part_path,
+                            head["ContentLength"], etag=etag,
+                            part_size=self.part_size,
+                            max_workers=self.max_workers)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+        with self.lock:
+            self.entries[name] = head["ContentLength"]
+            self.entries.move_to_end(name)
+            self.pins[name] = self.pins.get(name, 0) + 1
+            self.evict()
+        return path
+
+    def release(self, path):
+        name = os.path.basename(path)
+        with self.lock:
+            count = self.pins.get(name, 0) - 1
+            if count > 0:
+                self.pins[name] = count
+            else:
+                self.pins.pop(name, None)
+            self.evict()
+
+    def evict(self):
+        # Caller holds the lock
+        total = self.total_bytes()
+        for name in list(self.entries):
+            if total <= self.max_bytes:
+                break
+            if name in self.pins:
+                continue
+            total -= self.entries.pop(name)
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+def get_video_cache():
+    # S3_CACHE_SIZE_MB=0 still downloads through the cache directory but
+    # removes each video once its request releases it
+    global _cache
+    with _client_lock:
+        if _cache is None:
+            _cache = S3VideoCache(
+                os.environ.get("S3_CACHE_DIR", "/tmp/s3_video_cache"),
+                int(os.environ.get("S3_CACHE_SIZE_MB", "2048")) * 1024 * 1024,
+                max_workers=int(os.environ.get("S3_DOWNLOAD_WORKERS", "4")))
+        return _cache
@@ -0,0 +1,105 @@
+import argparse
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from inference import (model_fn, input_fn, predict_fn, output_fn, iter_ndjson,
+                       NDJSON_CONTENT_TYPES)
+from response_format import encode_json
+
+
+# Local stand-in for the SageMaker container: GET /ping and
+# POST /invocations wired to the handler functions. ndjson responses go
+# out with chunked transfer encoding through iter_ndjson, one chunk per
+# utterance, so clients see results as soon as they are ready. Local video
+# paths are accepted here, unlike on the endpoint.
+class InvocationHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    model_dict = None
+
+    def do_GET(self):
+        if self.path != "/ping":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path != "/invocations":
+            self.send_error(404)
+            return
+
+        content_type = self.headers.get("Content-Type", "application/json")
+        accept = self.headers.get("Accept", "application/json")
+        if accept == "*/*":
+            accept = "application/json"
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+        try:
+            input_data = input_fn(body, content_type, allow_local_paths=True)
+            prediction = predict_fn(input_data, self.model_dict)
+            if accept in NDJSON_CONTENT_TYPES:
+                response = iter_ndjson(prediction)
+            else:
+                response = output_fn(prediction, accept)
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        except Exception as e:
+            traceback.print_exc()
+            self.send_error(500, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", accept)
+
+        if accept in NDJSON_CONTENT_TYPES:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for data in response:
+                    self.write_chunk(data)
+            except ConnectionError:
+                # Client went away, nothing left to terminate
+                self.close_connection = True
+                return
+            except Exception as e:
+                # The 200 is already sent, the error goes out as the last
+                # ndjson line and the connection is not reused
+                traceback.print_exc()
+                self.write_chunk(encode_json({"error": str(e)}) + b"\n")
+                self.close_connection = True
+            finally:
+                # Stops the prediction and releases its video
+                response.close()
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            data = response
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    InvocationHandler.model_dict = model_fn(args.model_dir)
+
+    server = ThreadingHTTPServer((args.host, args.port), InvocationHandler)
+    print(f"Serving on http://{args.host}:{args.port}/invocations")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
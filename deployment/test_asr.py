@@ -0,0 +1,67 @@
+import numpy as np
+import whisper
+from asr import detect_speech, split_at_timestamps
+
+
+def test_detect_speech_skips_silence():
+    sample_rate = 16000
+    rng = np.random.default_rng(0)
+
+    # 10 s of faint noise with speech-level bursts at 2-3.5 s and 6-6.8 s,
+    # the second burst has a 0.2 s pause that should be merged over
+    waveform = 0.001 * rng.standard_normal(10 * sample_rate).astype(np.float32)
+    t = np.arange(10 * sample_rate) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 220 * t).astype(np.float32)
+    for start, end in ((2.0, 3.5), (6.0, 6.3), (6.5, 6.8)):
+        waveform[int(start * sample_rate):int(end * sample_rate)] += \
+            tone[int(start * sample_rate):int(end * sample_rate)]
+
+    chunks = detect_speech(waveform, sample_rate)
+
+    assert len(chunks) == 2
+    assert abs(chunks[0][0] - 1.8) < 0.05 and abs(chunks[0][1] - 3.7) < 0.05
+    assert abs(chunks[1][0] - 5.8) < 0.05 and abs(chunks[1][1] - 7.0) < 0.05
+
+    # Silence only, nothing for whisper to decode
+    assert detect_speech(np.zeros(5 * sample_rate, dtype=np.float32)) == []
+
+
+def test_long_speech_is_split_for_whisper():
+    sample_rate = 16000
+    t = np.arange(70 * sample_rate) / sample_rate
+    waveform = (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+    chunks = detect_speech(np.concatenate([
+        np.zeros(sample_rate, dtype=np.float32), waveform]), sample_rate)
+
+    assert len(chunks) == 3
+    assert all(end - start <= 30.0 for start, end in chunks)
+    assert chunks[0][1] == chunks[1][0]
+
+
+def test_chunks_split_at_whisper_timestamps():
+    tokenizer = whisper.tokenizer.get_tokenizer(False)
+
+    def timestamp(seconds):
+        return tokenizer.timestamp_begin + round(seconds / 0.02)
+
+    first = tokenizer.encode(" How are you?")
+    second = tokenizer.encode(" Fine, thanks.")
+    tail = tokenizer.encode(" And you")
+    tokens = ([timestamp(0.0)] + first + [timestamp(1.5), timestamp(1.5)]
+              + second + [timestamp(3.2), timestamp(4.0)] + tail)
+
+    # One VAD chunk, three utterances; the last one has no closing
+    # timestamp and runs to the end of the chunk
+    assert split_at_timestamps(tokens, tokenizer, 5.0) == [
+        (0.0, 1.5, "How are you?"), (1.5, 3.2, "Fine, thanks."),
+        (4.0, 5.0, "And you")]
+
+    # Without timestamp tokens the chunk is one utterance
+    assert split_at_timestamps(first, tokenizer, 2.0) == [(0.0, 2.0, "How are you?")]
+
+
+if __name__ == "__main__":
+    test_detect_speech_skips_silence()
+    test_long_speech_is_split_for_whisper()
+    test_chunks_split_at_whisper_timestamps()
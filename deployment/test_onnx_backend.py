@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+import torch
+from onnx_backend import export_onnx, OnnxSentimentModel
+
+try:
+    from multimodal_core.models import MultimodalSentimentModel
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.models import MultimodalSentimentModel
+
+
+def make_inputs(batch_size, sequence_length, num_frames, size):
+    generator = torch.Generator().manual_seed(batch_size)
+    input_ids = torch.randint(1000, 2000, (batch_size, sequence_length),
+                              generator=generator)
+    attention_mask = torch.ones(batch_size, sequence_length, dtype=torch.long)
+    attention_mask[:, sequence_length // 2:] = 0
+    video_frames = torch.rand(batch_size, num_frames, 3, size, size,
+                              generator=generator)
+    audio_features = torch.randn(batch_size, 1, 64, 300, generator=generator)
+
+    return input_ids, attention_mask, video_frames, audio_features
+
+
+def test_onnx_matches_pytorch():
+    # Untrained weights, no pretrained download needed
+    torch.manual_seed(0)
+    model = MultimodalSentimentModel(pretrained=False).eval()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "model.onnx")
+        export_onnx(model, path, make_inputs(1, 128, 8, 112))
+        onnx_model = OnnxSentimentModel(path, intra_op_threads=2,
+                                        inter_op_threads=1)
+
+        # Batch size, sequence length and clip shape differ from the export
+        for shape in ((1, 128, 8, 112), (3, 32, 4, 64)):
+            input_ids, attention_mask, video_frames, audio_features = make_inputs(*shape)
+            text_inputs = {'input_ids': input_ids,
+                           'attention_mask': attention_mask}
+
+            with torch.inference_mode():
+                expected = model(text_inputs, video_frames, audio_features)
+            actual = onnx_model(text_inputs, video_frames, audio_features)
+
+            for name in ('emotions', 'sentiments'):
+                assert actual[name].shape == expected[name].shape
+                assert torch.allclose(actual[name], expected[name], atol=1e-4), (
+                    name, (actual[name] - expected[name]).abs().max())
+
+
+if __name__ == "__main__":
+    test_onnx_matches_pytorch()
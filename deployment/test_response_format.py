@@ -0,0 +1,70 @@
+import io
+import json
+import numpy as np
+from response_format import strip_fields, encode_json, encode_npz
+
+EMOTIONS = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+SENTIMENTS = ["negative", "neutral", "positive"]
+
+
+def make_prediction(start, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        "start_time": start,
+        "end_time": start + 1.5,
+        "text": f"utterance {seed}",
+        "emotions": [{"label": "joy", "confidence": 0.5}],
+        "sentiments": [{"label": "positive", "confidence": 0.7}],
+        "emotion_probs": rng.dirichlet(np.ones(7)).astype(np.float32),
+        "sentiment_probs": rng.dirichlet(np.ones(3)).astype(np.float32)
+    }
+
+
+def test_json_keeps_top3_only():
+    prediction = make_prediction(0.0, 0)
+    decoded = json.loads(encode_json(strip_fields(prediction)))
+
+    assert "emotion_probs" not in decoded
+    assert decoded["emotions"] == prediction["emotions"]
+
+    result = {"video_path": "a.mp4", "utterances": [prediction]}
+    decoded = json.loads(encode_json(strip_fields(result)))
+    assert "emotion_probs" not in decoded["utterances"][0]
+
+
+def test_npz_round_trip():
+    predictions = [make_prediction(0.0, 0), make_prediction(2.0, 1)]
+    data = np.load(io.BytesIO(encode_npz(predictions, EMOTIONS, SENTIMENTS)),
+                   allow_pickle=False)
+
+    assert data["emotion_probs"].shape == (2, 7)
+    assert np.array_equal(data["emotion_probs"][1], predictions[1]["emotion_probs"])
+    assert np.array_equal(data["sentiment_probs"][0], predictions[0]["sentiment_probs"])
+    assert list(data["text"]) == ["utterance 0", "utterance 1"]
+    assert list(data["emotion_labels"]) == EMOTIONS
+
+    # Batch results: utterances flattened with their video index
+    results = [{"video_path": "a.mp4", "utterances": predictions},
+               {"video_path": "b.mp4", "utterances": [], "error": "not found"},
+               {"video_path": "c.mp4", "utterances": [make_prediction(1.0, 2)]}]
+    data = np.load(io.BytesIO(encode_npz(results, EMOTIONS, SENTIMENTS)),
+                   allow_pickle=False)
+
+    assert list(data["video_index"]) == [0, 0, 2]
+    assert list(data["errors"]) == ["", "not found", ""]
+    assert data["emotion_probs"].shape == (3, 7)
+    assert "fused_embedding" not in data.files
+
+    # Requested embeddings go out in both formats
+    prediction = {**make_prediction(0.0, 3),
+                  "fused_embedding": np.arange(256, dtype=np.float32)}
+    data = np.load(io.BytesIO(encode_npz([prediction], EMOTIONS, SENTIMENTS)),
+                   allow_pickle=False)
+    assert np.array_equal(data["fused_embedding"][0], prediction["fused_embedding"])
+    decoded = json.loads(encode_json(strip_fields(prediction)))
+    assert decoded["fused_embedding"] == list(range(256))
+
+
+if __name__ == "__main__":
+    test_json_keeps_top3_only()
+    test_npz_round_trip()
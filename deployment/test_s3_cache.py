@@ -0,0 +1,117 @@
+import hashlib
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import boto3
+from botocore.config import Config
+from s3_cache import S3VideoCache
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test")
+
+
+# Minimal S3-compatible stand-in: path-style HEAD and ranged GET on an
+# in-memory bucket, counting the bytes it serves
+class FakeS3Handler(BaseHTTPRequestHandler):
+    objects = {}
+    bytes_served = 0
+
+    def log_message(self, *args):
+        pass
+
+    def lookup(self):
+        data = self.objects.get(self.path.split("?")[0])
+        if data is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        return data
+
+    def do_HEAD(self):
+        data = self.lookup()
+        if data is None:
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", f'"{hashlib.md5(data).hexdigest()}"')
+        self.end_headers()
+
+    def do_GET(self):
+        data = self.lookup()
+        if data is None:
+            return
+        start, end = 0, len(data) - 1
+        if "Range" in self.headers:
+            start, end = (int(x) for x in
+                          self.headers["Range"].split("=")[1].split("-"))
+        body = data[start:end + 1]
+        FakeS3Handler.bytes_served += len(body)
+
+        self.send_response(206 if "Range" in self.headers else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", f'"{hashlib.md5(data).hexdigest()}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_client(server):
+    return boto3.client(
+        "s3", region_name="us-east-1",
+        endpoint_url=f"http://127.0.0.1:{server.server_address[1]}",
+        config=Config(s3={"addressing_style": "path"}))
+
+
+def test_s3_cache_download_hit_and_eviction():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeS3Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = make_client(server)
+
+    first = os.urandom(300 * 1024)
+    second = os.urandom(200 * 1024)
+    FakeS3Handler.objects = {"/bucket/a/first.mp4": first,
+                             "/bucket/b/second.mp4": second}
+
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # Small parts to exercise the parallel ranged download
+            cache = S3VideoCache(cache_dir, max_bytes=400 * 1024,
+                                 client=client, part_size=64 * 1024)
+
+            path = cache.acquire("s3://bucket/a/first.mp4")
+            with open(path, "rb") as f:
+                assert f.read() == first
+            cache.release(path)
+
+            # Repeat request is served from disk
+            served = FakeS3Handler.bytes_served
+            assert cache.acquire("s3://bucket/a/first.mp4") == path
+            assert FakeS3Handler.bytes_served == served
+            cache.release(path)
+
+            # Second object pushes the total past max_bytes, the least
+            # recently used file goes
+            other = cache.acquire("s3://bucket/b/second.mp4")
+            cache.release(other)
+            assert not os.path.exists(path) and os.path.exists(other)
+            assert cache.stats()["hits"] == 1
+            assert cache.stats()["misses"] == 2
+
+            # A new ETag means a new download
+            FakeS3Handler.objects["/bucket/b/second.mp4"] = first
+            changed = cache.acquire("s3://bucket/b/second.mp4")
+            assert changed != other
+            with open(changed, "rb") as f:
+                assert f.read() == first
+
+            # Over budget again: the released copy goes, the pinned one stays
+            assert not os.path.exists(other) and os.path.exists(changed)
+            cache.release(changed)
+            assert not any(name.endswith(".part")
+                           for name in os.listdir(cache_dir))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    test_s3_cache_download_hit_and_eviction()
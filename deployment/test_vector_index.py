@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import numpy as np
+import vector_index
+from vector_index import VectorIndex
+
+
+def test_exact_search_and_persistence():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 256)).astype(np.float32)
+    metadata = [{"row": i} for i in range(50)]
+
+    with tempfile.TemporaryDirectory() as path:
+        index = VectorIndex(path, writable=True)
+        # Incremental adds, small chunks so search merges across them
+        index.add(vectors[:30], metadata[:30])
+        index.add(vectors[30:], metadata[30:])
+        chunk_rows = vector_index.SEARCH_CHUNK_ROWS
+        vector_index.SEARCH_CHUNK_ROWS = 8
+        try:
+            results = index.search_id(7, k=5)
+        finally:
+            vector_index.SEARCH_CHUNK_ROWS = chunk_rows
+
+        unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(unit @ unit[7]))[1:6]
+        assert [row for _, row, _ in results] == list(expected)
+        assert results[0][2] == {"row": int(expected[0])}
+
+        # Reopened read-only from disk through the memmap
+        reopened = VectorIndex(path)
+        assert len(reopened) == 50
+        assert reopened.search_id(7, k=5) == results
+
+        # One writer at a time
+        try:
+            VectorIndex(path, writable=True)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Second writer was allowed")
+        index.close()
+
+        # Rows written but not yet committed: readers leave them alone,
+        # the next writer drops them
+        vectors_path = os.path.join(path, vector_index.VECTORS_FILE)
+        with open(vectors_path, "ab") as f:
+            f.write(vectors[:2].tobytes())
+        with open(os.path.join(path, vector_index.METADATA_FILE), "a") as f:
+            f.write(json.dumps({"row": "partial"}) + "\n")
+        size = os.path.getsize(vectors_path)
+        reader = VectorIndex(path)
+        assert len(reader) == 50 and len(reader.metadata) == 50
+        assert os.path.getsize(vectors_path) == size
+        try:
+            reader.add(vectors[:1], [{"row": 50}])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Read-only index accepted an add")
+
+        recovered = VectorIndex(path, writable=True)
+        assert len(recovered) == 50 and len(recovered.metadata) == 50
+        assert os.path.getsize(vectors_path) == 50 * 256 * 4
+        recovered.add(vectors[:1], [{"row": 50}])
+        assert {m["row"] for _, _, m in recovered.search(vectors[0], k=2)} == {0, 50}
+
+        if vector_index.faiss is not None:
+            approximate = recovered.search_id(7, k=5, approximate=True)
+            assert approximate[0][1] == expected[0]
+
+
+if __name__ == "__main__":
+    test_exact_search_and_persistence()
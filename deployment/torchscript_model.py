@@ -0,0 +1,55 @@
+import os
+import torch
+import torch.nn as nn
+from transformers import AutoTokenizer
+
+EXPORTED_MODEL_FILE = 'model.ts'
+TOKENIZER_DIR = 'tokenizer'
+
+
+# Flat tensor signature for tracing, the dict in/dict out of
+# MultimodalSentimentModel.forward is restored by TracedSentimentModel
+class ExportWrapper(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, video_frames, audio_features):
+        outputs = self.model({'input_ids': input_ids,
+                              'attention_mask': attention_mask},
+                             video_frames, audio_features)
+        return outputs['emotions'], outputs['sentiments']
+
+
+class TracedSentimentModel:
+    def __init__(self, module):
+        self.module = module
+
+    def __call__(self, text_inputs, video_frames, audio_features):
+        emotions, sentiments = self.module(text_inputs['input_ids'],
+                                           text_inputs['attention_mask'],
+                                           video_frames, audio_features)
+        return {'emotions': emotions, 'sentiments': sentiments}
+
+
+def find_exported_model(model_dir):
+    for path in (os.path.join(model_dir, EXPORTED_MODEL_FILE),
+                 os.path.join(model_dir, 'model', EXPORTED_MODEL_FILE)):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def load_exported_model(path, device):
+    # Self-contained graph and weights, no BERT or r3d_18 download
+    print("Loading exported model from path: " + path)
+    return TracedSentimentModel(torch.jit.load(path, map_location=device))
+
+
+def load_tokenizer(model_dir):
+    # Saved next to the exported model, falls back to the hub
+    for path in (os.path.join(model_dir, TOKENIZER_DIR),
+                 os.path.join(model_dir, 'model', TOKENIZER_DIR)):
+        if os.path.isdir(path):
+            return AutoTokenizer.from_pretrained(path)
+    return AutoTokenizer.from_pretrained('bert-base-uncased')
@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import threading
+import numpy as np
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+HEADER_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "metadata.jsonl"
+APPROXIMATE_FILE = "hnsw.faiss"
+LOCK_FILE = "index.lock"
+# Rows scored per step of the exact search, bounds the temporary memory
+SEARCH_CHUNK_ROWS = 65536
+
+
+def normalize(vectors):
+    # Unit length so inner product is cosine similarity. All-zero rows
+    # (every modality skipped) stay zero and never match anything.
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def fsync_file(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Directories can't be opened for fsync on Windows
+        pass
+    finally:
+        os.close(fd)
+
+
+def lock_exclusive(f):
+    # Held until the file is closed, released by the OS if the process dies
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+# Append-only store of utterance embeddings for similarity queries.
+# Vectors live in a raw float32 file read through np.memmap, metadata in
+# one JSON line per vector, and index.json holds the committed row count.
+# The data is synced to disk before the count, so rows from an
+# interrupted add are never counted. Opening is read-only by default and
+# never changes the files, readers see the first count rows. writable=True
+# takes the index's lock file, one writer at a time, and drops any
+# uncommitted tail before appending. Search is exact NumPy by default;
+# with faiss installed an HNSW index can answer approximately, kept in
+# sync on adds and saved next to the vectors.
+class VectorIndex:
+    def __init__(self, path, dim=256, writable=False):
+        self.path = path
+        self.dim = dim
+        self.writable = writable
+        self.count = 0
+        self.metadata = []
+        self.vectors = None
+        self.approximate_index = None
+        self.lock = threading.Lock()
+        self.lock_file = None
+
+        if writable:
+            os.makedirs(path, exist_ok=True)
+            self.lock_file = open(self.file(LOCK_FILE), "a+")
+            if not lock_exclusive(self.lock_file):
+                self.lock_file.close()
+                raise RuntimeError(f"Index at {path} is already open for writing")
+        header_path = os.path.join(path, HEADER_FILE)
+        if os.path.exists(header_path):
+            with open(header_path) as f:
+                header = json.load(f)
+            if header["dim"] != dim:
+                raise ValueError(f"Index at {path} holds {header['dim']}-dim "
+                                 f"vectors, not {dim}")
+            self.count = header["count"]
+        self.load()
+
+    def file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self):
+        self.metadata = []
+        if os.path.exists(self.file(METADATA_FILE)):
+            with open(self.file(METADATA_FILE)) as f:
+                for line in f:
+                    if len(self.metadata) == self.count:
+                        break
+                    self.metadata.append(json.loads(line))
+        if len(self.metadata) != self.count:
+            raise ValueError(f"Index at {self.path} has {len(self.metadata)} "
+                             f"metadata lines for {self.count} vectors")
+
+        if self.writable:
+            # Crash recovery: drop rows an interrupted add left behind
+            with open(self.file(VECTORS_FILE), "ab") as f:
+                f.truncate(self.count * self.dim * 4)
+            with open(self.file(METADATA_FILE), "w") as f:
+                f.writelines(json.dumps(m) + "\n" for m in self.metadata)
+
+        self.remap()
+
+    def remap(self):
+        self.vectors = None
+        if self.count:
+            self.vectors = np.memmap(self.file(VECTORS_FILE), dtype=np.float32,
+                                     mode="r", shape=(self.count, self.dim))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, vectors, metadata):
+        if not self.writable:
+            raise ValueError("Index was opened read-only, pass writable=True")
+        vectors = normalize(vectors).reshape(-1, self.dim)
+        if len(vectors) != len(metadata):
+            raise ValueError("One metadata entry is needed per vector")
+        if not len(vectors):
+            return
+
+        with self.lock:
+            # Rows reach the disk before the count that commits them
+            with open(self.file(VECTORS_FILE), "ab") as f:
+                f.write(vectors.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+            with open(self.file(METADATA_FILE), "a") as f:
+                f.writelines(json.dumps(m) + "\n" for m in metadata)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self.count += len(vectors)
+            self.metadata.extend(metadata)
+            temp_path = self.file(HEADER_FILE) + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump({"dim": self.dim, "count": self.count}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.file(HEADER_FILE))
+            fsync_file(self.path)
+
+            self.remap()
+            if self.approximate_index is not None:
+                self.approximate_index.add(vectors)
+
+    def search(self, query, k=10, approximate=False, exclude=None):
+        # [(similarity, row, metadata)] for the k most similar vectors
+        query = normalize(query).reshape(self.dim)
+        if not self.count:
+            return []
+        # One extra result to make room for the excluded row
+        wanted = min(k + (exclude is not None), self.count)
+
+        if approximate:
+            scores, rows = self.load_approximate().search(query[None], wanted)
+            results = zip(scores[0], rows[0])
+        else:
+            best_scores = np.empty(0, dtype=np.float32)
+            best_rows = np.empty(0, dtype=np.int64)
+            for start in range(0, self.count, SEARCH_CHUNK_ROWS):
+                scores = self.vectors[start:start + SEARCH_CHUNK_ROWS] @ query
+                best_scores = np.concatenate([best_scores, scores])
+                best_rows = np.concatenate([
+                    best_rows, np.arange(start, start + len(scores))])
+                if len(best_scores) > wanted:
+                    top = np.argpartition(-best_scores, wanted)[:wanted]
+                    best_scores, best_rows = best_scores[top], best_rows[top]
+            order = np.argsort(-best_scores)
+            results = zip(best_scores[order], best_rows[order])
+
+        return [(float(score), int(row), self.metadata[row])
+                for score, row in results
+                if row >= 0 and row != exclude][:k]
+
+    def search_id(self, row, k=10, approximate=False):
+        # Utterances most similar to one already in the index
+        return self.search(np.array(self.vectors[row]), k, approximate,
+                           exclude=row)
+
+    def load_approximate(self):
+        if faiss is None:
+            raise ImportError("Approximate search needs faiss, "
+                              "pip install faiss-cpu")
+        with self.lock:
+            if self.approximate_index is None:
+                path = self.file(APPROXIMATE_FILE)
+                if os.path.exists(path):
+                    index = faiss.read_index(path)
+                    if index.ntotal > self.count:
+                        index = None
+                else:
+                    index = None
+                if index is None:
+                    index = faiss.IndexHNSWFlat(self.dim, 32,
+                                                faiss.METRIC_INNER_PRODUCT)
+                # Rows added since the HNSW index was last saved
+                if index.ntotal < self.count:
+                    index.add(np.ascontiguousarray(self.vectors[index.ntotal:]))
+                self.approximate_index = index
+            return self.approximate_index
+
+    def save_approximate(self):
+        # Readers save too, replaced whole so concurrent readers never see
+        # a partial file
+        if self.approximate_index is not None:
+            with self.lock:
+                temp_path = self.file(APPROXIMATE_FILE) + f".{os.getpid()}.tmp"
+                faiss.write_index(self.approximate_index, temp_path)
+                os.replace(temp_path, self.file(APPROXIMATE_FILE))
+
+    def close(self):
+        if self.lock_file is not None:
+            self.lock_file.close()
+            self.lock_file = None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--index-dir", type=str, required=True)
+    parser.add_argument("--query-id", type=int, required=True)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--approximate", action="store_true")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    index = VectorIndex(args.index_dir)
+    if not 0 <= args.query_id < len(index):
+        raise SystemExit(f"--query-id must be below {len(index)}")
+
+    query = index.metadata[args.query_id]
+    print(f"Query: {query}")
+    for score, row, metadata in index.search_id(args.query_id, args.k,
+                                                args.approximate):
+        print(f"{score:.3f} [{row}] {json.dumps(metadata)}")
+    if args.approximate:
+        index.save_approximate()
+
+
+if __name__ == "__main__":
+    main()
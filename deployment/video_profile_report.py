@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import sys
+import torch
+from transformers import AutoTokenizer
+from inference import load_model
+from dev_eval import load_dev_samples, predict_samples, agreement, percentile
+
+try:
+    from multimodal_core.preprocessing import VIDEO_PROFILES
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import VIDEO_PROFILES
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model-dir", type=str, default="model")
+    parser.add_argument("--dev-csv", type=str,
+                        default="../dataset/dev/dev_sent_emo.csv")
+    parser.add_argument("--dev-video-dir", type=str,
+                        default="../dataset/dev/dev_splits_complete")
+    parser.add_argument("--max-samples", type=int, default=None)
+    parser.add_argument("--profiles", type=str, nargs="+",
+                        default=list(VIDEO_PROFILES))
+    parser.add_argument("--output", type=str, default=None)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    model = load_model(args.model_dir, torch.device("cpu"))
+    tokenizer = AutoTokenizer.from_pretrained('bert-base-uncased')
+
+    report = {}
+    baseline = None
+    for name in args.profiles:
+        samples = load_dev_samples(args.dev_csv, args.dev_video_dir, tokenizer,
+                                   max_samples=args.max_samples,
+                                   video_profile=name)
+        if not samples:
+            raise ValueError(f"No dev samples found in {args.dev_video_dir}")
+
+        predictions = predict_samples(model, samples)
+        if baseline is None:
+            baseline = predictions
+
+        video_load_times = [s['video_load_time'] for s in samples]
+        report[name] = {
+            **VIDEO_PROFILES[name],
+            'num_samples': len(samples),
+            'emotion_accuracy': agreement(
+                predictions['emotions'], [s['emotion_label'] for s in samples]),
+            'sentiment_accuracy': agreement(
+                predictions['sentiments'], [s['sentiment_label'] for s in samples]),
+            f'emotion_agreement_{args.profiles[0]}': agreement(
+                predictions['emotions'], baseline['emotions']),
+            f'sentiment_agreement_{args.profiles[0]}': agreement(
+                predictions['sentiments'], baseline['sentiments']),
+            'video_load_mean_ms': 1000 * sum(video_load_times) / len(samples),
+            'model_mean_ms': 1000 * sum(predictions['latencies']) / len(samples),
+            'model_p95_ms': 1000 * percentile(predictions['latencies'], 95)
+        }
+        print(f"{name}: {json.dumps(report[name])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,9 @@ try:
     from datetime import datetime
     import hashlib
     import logging
+    import time
     import random
+    from multimodal_core.lru_cache import LRUCache, normalize_text
 except ImportError as e:
     print(f"Missing dependency: {e}")
     print("Please install required packages using: pip install -r requirements.txt")
@@ -44,6 +46,23 @@ sentiment_analyzer = pipeline("sentiment-analysis", model="cardiffnlp/twitter-ro
 emotion_classifier = pipeline("text-classification", model="j-hartmann/emotion-english-distilroberta-base")
 print("All models loaded successfully!")
 
+# Pipeline results keyed on normalized text, repeated utterances skip the models
+text_result_cache = LRUCache(
+    max_size=int(os.environ.get('TEXT_CACHE_SIZE', '10000')),
+    path=os.environ.get('TEXT_CACHE_PATH'),
+    tag='flask-text-pipelines'
+)
+
+def classify_text(name, classifier, text):
+    """Run a text pipeline through the shared result cache"""
+    # Both pipelines are cased RoBERTa models, so case stays part of the key
+    key = f"{name}:{normalize_text(text, lowercase=False)}"
+    result = text_result_cache.get(key)
+    if result is None:
+        result = classifier(text)
+        text_result_cache.put(key, result)
+    return result
+
 @app.route('/analyze', methods=['POST'])
 def analyze_video():
     try:
@@ -63,26 +82,42 @@ def analyze_video():
             video_file.save(tmp_file.name)
             video_path = tmp_file.name
         
+        # Per-stage wall time, returned in the Server-Timing header
+        timings = []
+        stage_start = time.perf_counter()
+
+        def end_stage(name):
+            nonlocal stage_start
+            now = time.perf_counter()
+            timings.append(f"{name};dur={1000 * (now - stage_start):.1f}")
+            stage_start = now
+
         # Extract frames and analyze
         frame_analysis = analyze_video_frames(video_path, video_hash)
+        end_stage('frames')
         
         # Extract audio and analyze
         audio_analysis = analyze_audio(video_path, video_hash)
+        end_stage('audio')
         
         # Extract speech from audio
         speech_analysis = extract_speech(video_path, video_hash)
+        end_stage('speech')
         
         # Generate unique contextual analysis
         contextual_analysis = generate_unique_contextual_analysis(frame_analysis, audio_analysis, speech_analysis, video_hash)
         
         # Combine all analyses
         combined_analysis = combine_analyses(frame_analysis, audio_analysis, speech_analysis, contextual_analysis, video_hash)
+        end_stage('combine')
         
         # Clean up
         os.unlink(video_path)
         
         logger.info(f"Analysis complete for: {video_file.filename} (ID: {video_hash})")
-        return jsonify(combined_analysis)
+        response = jsonify(combined_analysis)
+        response.headers['Server-Timing'] = ', '.join(timings)
+        return response
         
     except Exception as e:
         logger.error(f"Error processing video: {str(e)}")
@@ -381,8 +416,8 @@ def combine_analyses(frame_analysis, audio_analysis, speech_analysis, contextual
             text_to_analyze = contextual_analysis
             text_source = "contextual_analysis"
         
-        sentiment_result = sentiment_analyzer(text_to_analyze)
-        primary_emotion = emotion_classifier(text_to_analyze)
+        sentiment_result = classify_text('sentiment', sentiment_analyzer, text_to_analyze)
+        primary_emotion = classify_text('emotion', emotion_classifier, text_to_analyze)
         
         # Generate multiple emotions
         emotion_results = [{
@@ -492,7 +527,7 @@ def generate_multiple_sentiments(text_to_analyze, video_hash):
     
     try:
         # Primary sentiment
-        primary_sentiment = sentiment_analyzer(text_to_analyze)
+        primary_sentiment = classify_text('sentiment', sentiment_analyzer, text_to_analyze)
         sentiments.append({
             'id': f"sentiment_{video_hash}_primary_{hash(primary_sentiment[0]['label']) % 1000:03d}",
             'label': primary_sentiment[0]['label'],
@@ -629,7 +664,8 @@ def health_check():
             'Comprehensive logging system',
             'Real-time processing'
         ],
-        'version': '2.0 - Enhanced with Explainability & Uniqueness'
+        'version': '2.0 - Enhanced with Explainability & Uniqueness',
+        'text_cache': text_result_cache.stats()
     })
 
 if __name__ == '__main__':
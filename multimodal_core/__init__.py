@@ -0,0 +1 @@
+# Model and preprocessing code shared by training/ and deployment/
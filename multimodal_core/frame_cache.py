@@ -0,0 +1,140 @@
+import bisect
+import threading
+from collections import OrderedDict
+import cv2
+import numpy as np
+import torch
+from .preprocessing import (
+    NUM_FRAMES, FRAME_SIZE, SAMPLE_RATE, MAX_AUDIO_LENGTH, _PIXEL_SCALE,
+    mel_features_from_waveform, check_frame_sampling)
+
+# Timestamps within this many seconds of a segment edge count as inside
+TIME_EPSILON = 1e-3
+
+
+def _segment_indices(total, num_frames, stride):
+    # Same selection load_video_frames makes on a clip of total frames
+    if stride > 0:
+        indices = range(0, num_frames * stride, stride)
+    elif total <= num_frames:
+        indices = range(num_frames)
+    else:
+        indices = [round(i * (total - 1) / (num_frames - 1))
+                   for i in range(num_frames)]
+    return [i for i in indices if i < total]
+
+
+# Decodes a video once, front to back, into resized uint8 frames with
+# their timestamps. Segments select frames by time instead of cutting and
+# decoding their own clip, so decoding is linear in video length however
+# much the segments overlap. Frames past max_bytes are evicted oldest
+# first; a segment that needs an evicted frame reopens the video and
+# skips forward to it.
+class FrameBuffer:
+    def __init__(self, video_path, size=FRAME_SIZE, max_bytes=512 * 1024 * 1024):
+        self.video_path = video_path
+        self.size = size
+        self.max_frames = max(1, max_bytes // (size * size * 3))
+        self.cap = None
+        self.fps = 0.0
+        self.next_index = 0
+        self.finished = False
+        # Every decoded frame's time, kept after eviction for lookups
+        self.timestamps = []
+        self.frames = OrderedDict()
+        self.decoded = 0
+        self.lock = threading.Lock()
+
+    def open(self, start_index=0):
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = cv2.VideoCapture(self.video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Video not found: {self.video_path}")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0
+        self.finished = False
+
+        # Frames before start_index are skipped without decoding to an image
+        self.next_index = 0
+        while self.next_index < start_index and self.cap.grab():
+            self.next_index += 1
+
+    def read_frame(self):
+        ret, frame = self.cap.read()
+        if not ret or frame is None:
+            self.finished = True
+            return False
+
+        index = self.next_index
+        self.next_index += 1
+        self.decoded += 1
+        if index == len(self.timestamps):
+            timestamp = self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+            if index and timestamp <= self.timestamps[-1]:
+                # No usable container timestamps, fall back to frame rate
+                timestamp = index / self.fps
+            self.timestamps.append(timestamp)
+
+        self.frames[index] = cv2.resize(frame, (self.size, self.size))
+        while len(self.frames) > self.max_frames:
+            self.frames.popitem(last=False)
+        return True
+
+    def decode_until(self, end_time):
+        # Decode until the first frame at or after end_time
+        if self.cap is None:
+            self.open()
+        while not self.finished and (
+                not self.timestamps
+                or self.timestamps[-1] < end_time - TIME_EPSILON):
+            self.read_frame()
+
+    def segment_frames(self, start_time, end_time, num_frames=NUM_FRAMES,
+                       stride=1):
+        # [num_frames, 3, size, size] float32 in [0, 1], zero padded
+        check_frame_sampling(num_frames, stride)
+        frames = np.zeros((num_frames, self.size, self.size, 3), dtype=np.float32)
+
+        with self.lock:
+            self.decode_until(end_time)
+            first = bisect.bisect_left(self.timestamps, start_time - TIME_EPSILON)
+            last = bisect.bisect_left(self.timestamps, end_time - TIME_EPSILON)
+            indices = [first + i for i in
+                       _segment_indices(last - first, num_frames, stride)]
+            if not indices:
+                raise ValueError("No frames could be extracted")
+
+            # Evicted frames are collected as they are decoded again, the
+            # buffer alone may be smaller than the segment
+            selected = {index: self.frames[index] for index in indices
+                        if index in self.frames}
+            missing = [index for index in indices if index not in selected]
+            if missing:
+                self.open(start_index=missing[0])
+                while not self.finished and self.next_index <= missing[-1]:
+                    index = self.next_index
+                    if self.read_frame() and index in indices:
+                        selected[index] = self.frames[index]
+
+            for count, index in enumerate(indices):
+                if index in selected:
+                    np.take(_PIXEL_SCALE, selected[index], out=frames[count])
+
+        # Before permute: [frames, height, width, channels]
+        # After permute: [frames, channels, height, width]
+        return torch.from_numpy(frames).permute(0, 3, 1, 2)
+
+    def close(self):
+        with self.lock:
+            if self.cap is not None:
+                self.cap.release()
+                self.cap = None
+            self.frames.clear()
+
+
+def segment_audio_features(waveform, start_time, end_time,
+                           max_length=MAX_AUDIO_LENGTH):
+    # Mel features for one segment of a waveform decoded once per video
+    start = int(start_time * SAMPLE_RATE)
+    end = max(int(end_time * SAMPLE_RATE), start + 1)
+    return mel_features_from_waveform(waveform[:, start:end], max_length)
@@ -0,0 +1,52 @@
+import threading
+import torch
+
+# Mean absolute grey-level difference between consecutive frames on the
+# 0-255 scale, the motion_score the Flask backend computes
+MOTION_THRESHOLD = 1.0
+
+
+def motion_score(video_frames):
+    # video_frames: [frames, channels, height, width] in [0, 1]
+    gray = video_frames.mean(dim=1) * 255
+
+    # Zero padding past the end of a short clip is not motion
+    gray = gray[gray.flatten(1).any(dim=1)]
+    if gray.size(0) < 2:
+        return 0.0
+
+    return (gray[1:] - gray[:-1]).abs().mean().item()
+
+
+def has_text(text):
+    # Whisper returns "", "..." or music symbols for segments without speech
+    return any(c.isalnum() for c in text)
+
+
+def skip_masks(texts, video_frames, motion_threshold=MOTION_THRESHOLD):
+    # texts: list of utterances, video_frames: [batch_size, frames, C, H, W]
+    skip_text = torch.tensor([not has_text(text) for text in texts])
+    skip_video = torch.tensor([motion_score(frames) < motion_threshold
+                               for frames in video_frames])
+    return skip_text, skip_video
+
+
+class SkipStats:
+    def __init__(self):
+        self.samples = 0
+        self.skipped = {'text': 0, 'video': 0}
+        self.lock = threading.Lock()
+
+    def update(self, skip_text, skip_video):
+        with self.lock:
+            self.samples += skip_text.numel()
+            self.skipped['text'] += int(skip_text.sum())
+            self.skipped['video'] += int(skip_video.sum())
+
+    def rates(self):
+        with self.lock:
+            return {
+                'samples': self.samples,
+                'text_skip_rate': self.skipped['text'] / max(self.samples, 1),
+                'video_skip_rate': self.skipped['video'] / max(self.samples, 1)
+            }
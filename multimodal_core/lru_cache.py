@@ -0,0 +1,114 @@
+import atexit
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text, lowercase=True):
+    # Whitespace runs and case don't change bert-base-uncased token ids, so
+    # keys normalized this way still give exact cache hits. Cased models
+    # should pass lowercase=False.
+    text = " ".join(str(text).split())
+    return text.lower() if lowercase else text
+
+
+# Thread-safe LRU cache with hit/miss counters. With a path, the entries are
+# saved every save_every inserts and at exit, and loaded back on start.
+# Saved as JSON, so values must be JSON types; subclasses holding tensors
+# override write_state and read_state.
+class LRUCache:
+    def __init__(self, max_size=10000, path=None, save_every=100, tag=None):
+        self.max_size = max_size
+        self.path = path
+        self.save_every = save_every
+        self.tag = tag
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+        self.lock = threading.Lock()
+
+        if path is not None:
+            self.load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+            self.unsaved += 1
+            save = self.path is not None and self.unsaved >= self.save_every
+
+        if save:
+            self.save()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def save(self):
+        if self.path is None:
+            return
+
+        with self.lock:
+            if self.unsaved == 0:
+                return
+            state = {'tag': self.tag, 'entries': list(self.entries.items())}
+            self.unsaved = 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        self.write_state(state, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            state = self.read_state(self.path)
+        except Exception as e:
+            print(f"Ignoring unreadable cache {self.path}: {str(e)}")
+            return
+
+        # Entries computed by a different model would not be exact hits
+        if state['tag'] != self.tag:
+            print(f"Ignoring cache {self.path} built for {state['tag']}")
+            return
+
+        for key, value in state['entries'][-self.max_size:]:
+            self.entries[key] = value
+        print(f"Loaded {len(self.entries):,} cache entries from {self.path}")
+
+    def write_state(self, state, path):
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    def read_state(self, path):
+        with open(path) as f:
+            return json.load(f)
@@ -0,0 +1,213 @@
+import torch
+import torch.nn as nn
+from transformers import BertConfig, BertModel
+from torchvision import models as vision_models
+
+
+class TextEncoder(nn.Module):
+    def __init__(self, pretrained=True):
+        super().__init__()
+        if pretrained:
+            self.bert = BertModel.from_pretrained('bert-base-uncased')
+        else:
+            # Same architecture, weights come from a saved state dict
+            self.bert = BertModel(BertConfig())
+
+        for param in self.bert.parameters():
+            param.requires_grad = False
+
+        self.projection = nn.Linear(768, 128)
+
+    def pool(self, input_ids, attention_mask):
+        # Extract BERT embeddings
+        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+
+        # Use [CLS] token representation
+        return outputs.pooler_output
+
+    def forward(self, input_ids, attention_mask):
+        pooler_output = self.pool(input_ids, attention_mask)
+
+        return self.projection(pooler_output)
+
+
+class VideoEncoder(nn.Module):
+    def __init__(self, pretrained=True):
+        super().__init__()
+        self.backbone = vision_models.video.r3d_18(pretrained=pretrained)
+
+        for param in self.backbone.parameters():
+            param.requires_grad = False
+
+        num_fts = self.backbone.fc.in_features
+        self.backbone.fc = nn.Sequential(
+            nn.Linear(num_fts, 128),
+            nn.ReLU(),
+            nn.Dropout(0.2)
+        )
+
+        self.channels_last = False
+
+    def to_channels_last(self):
+        # NDHWC layout for the Conv3d weights and inputs
+        self.backbone.to(memory_format=torch.channels_last_3d)
+        self.channels_last = True
+        return self
+
+    def extract_features(self, x):
+        # [batch_size, frames, channels, height, width]->[batch_size, channels, frames, height, width]
+        x = x.transpose(1, 2)
+        if self.channels_last:
+            x = x.contiguous(memory_format=torch.channels_last_3d)
+
+        # Frozen r3d_18 trunk, everything up to the trainable fc head
+        x = self.backbone.stem(x)
+        x = self.backbone.layer1(x)
+        x = self.backbone.layer2(x)
+        x = self.backbone.layer3(x)
+        x = self.backbone.layer4(x)
+        x = self.backbone.avgpool(x)
+
+        # Features output: [batch_size, 512]
+        return x.flatten(1)
+
+    def forward(self, x):
+        return self.backbone.fc(self.extract_features(x))
+
+
+class AudioEncoder(nn.Module):
+    def __init__(self):
+        super().__init__()
+        self.conv_layers = nn.Sequential(
+            # Lower level features
+            nn.Conv1d(64, 64, kernel_size=3),
+            nn.BatchNorm1d(64),
+            nn.ReLU(),
+            nn.MaxPool1d(2),
+            # Higher level features
+            nn.Conv1d(64, 128, kernel_size=3),
+            nn.BatchNorm1d(128),
+            nn.ReLU(),
+            nn.AdaptiveAvgPool1d(1)
+        )
+
+        for param in self.conv_layers.parameters():
+            param.requires_grad = False
+
+        self.projection = nn.Sequential(
+            nn.Linear(128, 128),
+            nn.ReLU(),
+            nn.Dropout(0.2)
+        )
+
+    def forward(self, x):
+        x = x.squeeze(1)
+
+        features = self.conv_layers(x)
+        # Features output: [batch_size, 128, 1]
+
+        return self.projection(features.squeeze(-1))
+
+
+class MultimodalSentimentModel(nn.Module):
+    def __init__(self, pretrained=True):
+        super().__init__()
+
+        # Encoders, pretrained=False skips downloading BERT and r3d_18 weights
+        # when a full state dict is loaded right after
+        self.text_encoder = TextEncoder(pretrained)
+        self.video_encoder = VideoEncoder(pretrained)
+        self.audio_encoder = AudioEncoder()
+
+        # Fusion layer
+        self.fusion_layer = nn.Sequential(
+            nn.Linear(128 * 3, 256),
+            nn.BatchNorm1d(256),
+            nn.ReLU(),
+            nn.Dropout(0.3)
+        )
+
+        # Classification heads
+        self.emotion_classifier = nn.Sequential(
+            nn.Linear(256, 64),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(64, 7)  # Sadness, anger
+        )
+
+        self.sentiment_classifier = nn.Sequential(
+            nn.Linear(256, 64),
+            nn.ReLU(),
+            nn.Dropout(0.2),
+            nn.Linear(64, 3)  # Negative, positive, neutral
+        )
+
+    def encode_text(self, text_inputs):
+        # Cached BERT pooler output: {'pooler_output': [batch_size, 768]}
+        if 'pooler_output' in text_inputs:
+            return self.text_encoder.projection(text_inputs['pooler_output'])
+        return self.text_encoder(
+            text_inputs['input_ids'],
+            text_inputs['attention_mask'],
+        )
+
+    def encode_video(self, video_frames):
+        # Cached r3d_18 features: [batch_size, 512]
+        if video_frames.dim() == 2:
+            return self.video_encoder.backbone.fc(video_frames)
+        return self.video_encoder(video_frames)
+
+    def forward(self, text_inputs, video_frames, audio_features,
+                skip_text=None, skip_video=None, return_embeddings=False):
+        # skip_text / skip_video: optional [batch_size] bool masks, skipped
+        # samples get a zero embedding instead of running the encoder.
+        # return_embeddings adds the 128-dim modality projections and the
+        # 256-dim fused vector to the outputs.
+        text_features = gated_encode(self.encode_text, text_inputs, skip_text)
+        video_features = gated_encode(self.encode_video, video_frames, skip_video)
+        audio_features = self.audio_encoder(audio_features)
+
+        # Concatenate multimodal features
+        combined_features = torch.cat([
+            text_features,
+            video_features,
+            audio_features
+        ], dim=1)  # [batch_size, 128 * 3]
+
+        fused_features = self.fusion_layer(combined_features)
+
+        emotion_output = self.emotion_classifier(fused_features)
+        sentiment_output = self.sentiment_classifier(fused_features)
+
+        outputs = {
+            'emotions': emotion_output,
+            'sentiments': sentiment_output
+        }
+        if return_embeddings:
+            outputs.update({
+                'text_features': text_features,
+                'video_features': video_features,
+                'audio_features': audio_features,
+                'fused_features': fused_features
+            })
+        return outputs
+
+
+def _select(inputs, keep):
+    if isinstance(inputs, dict):
+        return {k: v[keep] for k, v in inputs.items()}
+    return inputs[keep]
+
+
+def gated_encode(encode, inputs, skip, embedding_dim=128):
+    if skip is None or not skip.any():
+        return encode(inputs)
+
+    keep = ~skip
+    if not keep.any():
+        return torch.zeros(skip.size(0), embedding_dim, device=skip.device)
+
+    kept = encode(_select(inputs, keep))
+    features = kept.new_zeros(skip.size(0), kept.size(1))
+    features[keep] = kept
+    return features
@@ -0,0 +1,170 @@
+import subprocess
+import cv2
+import numpy as np
+import torch
+import torchaudio
+from .runtime import ffmpeg_binary
+
+NUM_FRAMES = 30
+FRAME_SIZE = 224
+
+SAMPLE_RATE = 16000
+NUM_MELS = 64
+MAX_AUDIO_LENGTH = 300
+
+TEXT_MAX_LENGTH = 128
+
+# uint8 pixel -> float32 in [0, 1], same values as frame / 255.0 cast to float32
+_PIXEL_SCALE = (np.arange(256) / 255.0).astype(np.float32)
+
+_mel_spectrogram = None
+
+
+# Video input profiles: frame count, stride and square frame size. stride=0
+# spreads the frames evenly over the whole segment instead of taking the
+# first num_frames * stride. 'default' is what the model was trained on.
+VIDEO_PROFILES = {
+    'default': {'num_frames': 30, 'stride': 1, 'size': 224},
+    'uniform': {'num_frames': 30, 'stride': 0, 'size': 224},
+    'uniform112': {'num_frames': 16, 'stride': 0, 'size': 112},
+    'fast112': {'num_frames': 8, 'stride': 0, 'size': 112},
+}
+
+
+def get_video_profile(name):
+    if name not in VIDEO_PROFILES:
+        raise ValueError(f"Unknown video profile: {name}, "
+                         f"expected one of {sorted(VIDEO_PROFILES)}")
+    return VIDEO_PROFILES[name]
+
+
+def check_frame_sampling(num_frames, stride):
+    # stride=0 places the first and last frame at the segment ends, which
+    # needs at least two frames
+    if num_frames < 1 or stride < 0:
+        raise ValueError(f"Invalid frame sampling: num_frames={num_frames}, "
+                         f"stride={stride}")
+    if stride == 0 and num_frames < 2:
+        raise ValueError("stride=0 needs num_frames of at least 2")
+
+
+def _frame_indices(cap, num_frames, stride):
+    if stride > 0:
+        return list(range(0, num_frames * stride, stride))
+
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if total <= num_frames:
+        return list(range(num_frames))
+    return [round(i * (total - 1) / (num_frames - 1)) for i in range(num_frames)]
+
+
+def load_video_frames(video_path, num_frames=NUM_FRAMES, size=FRAME_SIZE, stride=1):
+    check_frame_sampling(num_frames, stride)
+    cap = cv2.VideoCapture(video_path)
+
+    # Written in place, frames past the end of the video stay zero padded
+    frames = np.zeros((num_frames, size, size, 3), dtype=np.float32)
+    count = 0
+
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Video not found: {video_path}")
+
+        # The first read validates the video and is kept as frame 0
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            raise ValueError(f"Video not found: {video_path}")
+
+        indices = _frame_indices(cap, num_frames, stride)
+        index = 0
+
+        while ret and count < num_frames:
+            if index == indices[count]:
+                np.take(_PIXEL_SCALE, cv2.resize(frame, (size, size)),
+                        out=frames[count])
+                count += 1
+                if count == num_frames:
+                    break
+
+            # Frames in between are grabbed without decoding to an image
+            index += 1
+            if count < num_frames and index < indices[count]:
+                ret = cap.grab()
+            else:
+                ret, frame = cap.read()
+
+    except Exception as e:
+        raise ValueError(f"Video error: {str(e)}")
+    finally:
+        cap.release()
+
+    if count == 0:
+        raise ValueError("No frames could be extracted")
+
+    # Before permute: [frames, height, width, channels]
+    # After permute: [frames, channels, height, width]
+    return torch.from_numpy(frames).permute(0, 3, 1, 2)
+
+
+def load_audio_waveform(video_path):
+    # Decode straight to 16 kHz mono PCM on stdout, no intermediate wav file
+    try:
+        result = subprocess.run([
+            ffmpeg_binary(),
+            '-i', video_path,
+            '-vn',
+            '-acodec', 'pcm_s16le',
+            '-ar', str(SAMPLE_RATE),
+            '-ac', '1',
+            '-f', 's16le',
+            '-'
+        ], check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"Audio extraction error: {str(e)}")
+
+    samples = np.frombuffer(result.stdout, dtype=np.int16)
+
+    # Same scaling as torchaudio.load on a pcm_s16le wav: [1, num_samples]
+    return torch.from_numpy(samples.astype(np.float32) / 32768.0).unsqueeze(0)
+
+
+def mel_features_from_waveform(waveform, max_length=MAX_AUDIO_LENGTH):
+    global _mel_spectrogram
+    if _mel_spectrogram is None:
+        _mel_spectrogram = torchaudio.transforms.MelSpectrogram(
+            sample_rate=SAMPLE_RATE,
+            n_mels=NUM_MELS,
+            n_fft=1024,
+            hop_length=512
+        )
+
+    mel_spec = _mel_spectrogram(waveform)
+
+    # Normalize
+    mel_spec = (mel_spec - mel_spec.mean()) / mel_spec.std()
+
+    if mel_spec.size(2) < max_length:
+        padding = max_length - mel_spec.size(2)
+        mel_spec = torch.nn.functional.pad(mel_spec, (0, padding))
+    else:
+        mel_spec = mel_spec[:, :, :max_length]
+
+    return mel_spec
+
+
+def extract_audio_features(video_path, max_length=MAX_AUDIO_LENGTH):
+    try:
+        waveform = load_audio_waveform(video_path)
+        return mel_features_from_waveform(waveform, max_length)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Audio error: {str(e)}")
+
+
+def tokenize_utterance(tokenizer, text):
+    return tokenizer(text,
+                     padding='max_length',
+                     truncation=True,
+                     max_length=TEXT_MAX_LENGTH,
+                     return_tensors='pt')
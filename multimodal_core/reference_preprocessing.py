@@ -0,0 +1,97 @@
+import os
+import subprocess
+import cv2
+import numpy as np
+import torch
+import torchaudio
+from .runtime import ffmpeg_binary
+
+
+# Original, unoptimized preprocessing. Kept as the numerical reference the
+# optimized kernels in preprocessing.py are checked against.
+def reference_load_video_frames(video_path):
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Video not found: {video_path}")
+
+        ret, frame = cap.read()
+        if not ret or frame is None:
+            raise ValueError(f"Video not found: {video_path}")
+
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        while len(frames) < 30 and cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            frame = cv2.resize(frame, (224, 224))
+            frame = frame / 255.0
+            frames.append(frame)
+
+    except Exception as e:
+        raise ValueError(f"Video error: {str(e)}")
+    finally:
+        cap.release()
+
+    if (len(frames) == 0):
+        raise ValueError("No frames could be extracted")
+
+    # Pad or truncate frames
+    if len(frames) < 30:
+        frames += [np.zeros_like(frames[0])] * (30 - len(frames))
+    else:
+        frames = frames[:30]
+
+    return torch.FloatTensor(np.array(frames)).permute(0, 3, 1, 2)
+
+
+def reference_extract_audio_features(video_path):
+    audio_path = video_path.replace('.mp4', '.wav')
+
+    try:
+        subprocess.run([
+            ffmpeg_binary(),
+            '-i', video_path,
+            '-vn',
+            '-acodec', 'pcm_s16le',
+            '-ar', '16000',
+            '-ac', '1',
+            audio_path
+        ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        waveform, sample_rate = torchaudio.load(audio_path)
+
+        if sample_rate != 16000:
+            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
+            waveform = resampler(waveform)
+
+        mel_spectrogram = torchaudio.transforms.MelSpectrogram(
+            sample_rate=16000,
+            n_mels=64,
+            n_fft=1024,
+            hop_length=512
+        )
+
+        mel_spec = mel_spectrogram(waveform)
+
+        # Normalize
+        mel_spec = (mel_spec - mel_spec.mean()) / mel_spec.std()
+
+        if mel_spec.size(2) < 300:
+            padding = 300 - mel_spec.size(2)
+            mel_spec = torch.nn.functional.pad(mel_spec, (0, padding))
+        else:
+            mel_spec = mel_spec[:, :, :300]
+
+        return mel_spec
+
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"Audio extraction error: {str(e)}")
+    except Exception as e:
+        raise ValueError(f"Audio error: {str(e)}")
+    finally:
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
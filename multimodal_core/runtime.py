@@ -0,0 +1,82 @@
+import os
+import shutil
+import subprocess
+import time
+
+_ffmpeg_binary = None
+
+
+def find_ffmpeg():
+    # In order: FFMPEG_BINARY, ffmpeg on PATH, the binary bundled with the
+    # imageio-ffmpeg wheel. Never downloads anything.
+    path = os.environ.get("FFMPEG_BINARY")
+    if path:
+        return path if os.path.isfile(path) and os.access(path, os.X_OK) else None
+
+    path = shutil.which("ffmpeg")
+    if path:
+        return path
+
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return None
+
+
+def ffmpeg_binary():
+    global _ffmpeg_binary
+    if _ffmpeg_binary is None:
+        _ffmpeg_binary = find_ffmpeg() or "ffmpeg"
+    return _ffmpeg_binary
+
+
+def preflight_ffmpeg():
+    # Fail at startup instead of on the first request or batch
+    global _ffmpeg_binary
+    path = find_ffmpeg()
+    if path is None:
+        raise RuntimeError(
+            "FFmpeg not found. Put ffmpeg on PATH, set FFMPEG_BINARY or "
+            "install imageio-ffmpeg")
+
+    try:
+        result = subprocess.run([path, "-version"], capture_output=True,
+                                text=True, check=True, timeout=10)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise RuntimeError(f"FFmpeg at {path} does not run: {str(e)}")
+
+    _ffmpeg_binary = path
+    print(f"Using {result.stdout.splitlines()[0]} from {path}")
+    return path
+
+
+# Wall-clock time per named startup phase, printed as each one finishes
+class PhaseTimer:
+    def __init__(self, prefix="Cold start"):
+        self.prefix = prefix
+        self.phases = {}
+
+    def record(self, name, seconds):
+        self.phases[name] = seconds
+        print(f"{self.prefix} {name}: {seconds:.2f}s")
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def total(self):
+        return sum(self.phases.values())
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
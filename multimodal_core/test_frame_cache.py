@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import pytest
+import torch
+
+try:
+    from multimodal_core.preprocessing import load_video_frames, extract_audio_features, load_audio_waveform
+    from multimodal_core.frame_cache import FrameBuffer, segment_audio_features
+    from multimodal_core.runtime import find_ffmpeg
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import load_video_frames, extract_audio_features, load_audio_waveform
+    from multimodal_core.frame_cache import FrameBuffer, segment_audio_features
+    from multimodal_core.runtime import find_ffmpeg
+
+# The clip builder shared with the benchmarks
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from synthetic_media import make_clip
+
+
+def test_whole_clip_matches_load_video_frames():
+    if find_ffmpeg() is None:
+        pytest.skip("ffmpeg not found")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 40 frames at 25 fps
+        path = make_clip(temp_dir, 1.6, 320, 240, 25, "tone")
+
+        buffer = FrameBuffer(path, size=112)
+        for num_frames, stride in ((30, 1), (12, 4), (8, 0)):
+            assert torch.equal(
+                buffer.segment_frames(0.0, 40 / 25, num_frames, stride),
+                load_video_frames(path, num_frames, 112, stride))
+        # Each frame decoded once across all three requests
+        assert buffer.decoded == 40
+
+        audio = segment_audio_features(load_audio_waveform(path), 0.0, 10.0)
+        assert torch.equal(audio, extract_audio_features(path))
+
+
+def test_bounded_buffer_decodes_evicted_frames_again():
+    if find_ffmpeg() is None:
+        pytest.skip("ffmpeg not found")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 100 frames at 25 fps
+        path = make_clip(temp_dir, 4.0, 320, 240, 25, "tone")
+
+        unbounded = FrameBuffer(path, size=64)
+        # Room for 10 frames, less than one segment
+        bounded = FrameBuffer(path, size=64, max_bytes=10 * 64 * 64 * 3)
+
+        # Overlapping and out of order, as threads may ask for them
+        for start, end in ((0.5, 1.5), (1.2, 2.4), (0.2, 1.0), (3.0, 4.0)):
+            expected = unbounded.segment_frames(start, end, 16, 1)
+            assert torch.equal(bounded.segment_frames(start, end, 16, 1), expected)
+            # 25 fps, frames from start up to but not including end
+            num_frames = min(16, round((end - start) * 25))
+            assert expected[num_frames - 1].any() and not expected[num_frames:].any()
+
+        assert unbounded.decoded == 100
+        assert bounded.decoded > unbounded.decoded
+        bounded.close()
+        unbounded.close()
+
+
+if __name__ == "__main__":
+    test_whole_clip_matches_load_video_frames()
+    test_bounded_buffer_decodes_evicted_frames_again()
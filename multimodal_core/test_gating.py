@@ -0,0 +1,80 @@
+import os
+import sys
+import torch
+
+try:
+    from multimodal_core.models import MultimodalSentimentModel
+    from multimodal_core.gating import motion_score, skip_masks
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.models import MultimodalSentimentModel
+    from multimodal_core.gating import motion_score, skip_masks
+
+
+def test_motion_score():
+    static = torch.full((30, 3, 32, 32), 0.5)
+    assert motion_score(static) == 0.0
+
+    # Zero padded tail of a short clip does not count as motion
+    padded = static.clone()
+    padded[10:] = 0
+    assert motion_score(padded) == 0.0
+
+    moving = torch.rand(30, 3, 32, 32, generator=torch.Generator().manual_seed(0))
+    assert motion_score(moving) > 10
+
+    skip_text, skip_video = skip_masks(["...", "Okay."], torch.stack([static, moving]))
+    assert skip_text.tolist() == [True, False]
+    assert skip_video.tolist() == [True, False]
+
+
+def test_gated_forward_matches_per_sample():
+    torch.manual_seed(0)
+    model = MultimodalSentimentModel(pretrained=False).eval()
+
+    batch_size = 3
+    text_inputs = {
+        'input_ids': torch.randint(1000, 2000, (batch_size, 16)),
+        'attention_mask': torch.ones(batch_size, 16, dtype=torch.long)
+    }
+    video_frames = torch.rand(batch_size, 4, 3, 32, 32)
+    audio_features = torch.randn(batch_size, 1, 64, 300)
+    skip_text = torch.tensor([False, True, False])
+    skip_video = torch.tensor([True, False, False])
+
+    with torch.inference_mode():
+        plain = model(text_inputs, video_frames, audio_features)
+        none_skipped = model(text_inputs, video_frames, audio_features,
+                             skip_text=torch.zeros(batch_size, dtype=torch.bool),
+                             skip_video=torch.zeros(batch_size, dtype=torch.bool))
+        gated = model(text_inputs, video_frames, audio_features,
+                      skip_text=skip_text, skip_video=skip_video)
+
+        for name in ('emotions', 'sentiments'):
+            assert torch.equal(plain[name], none_skipped[name])
+            assert torch.allclose(plain[name][2], gated[name][2], atol=1e-6)
+
+        # A single sample with everything skipped takes the zeros path
+        single = model({k: v[:1] for k, v in text_inputs.items()},
+                       video_frames[:1], audio_features[:1],
+                       skip_text=torch.tensor([True]),
+                       skip_video=torch.tensor([True]))
+        features = model.fusion_layer(torch.cat([
+            torch.zeros(1, 256), model.audio_encoder(audio_features[:1])], dim=1))
+        assert torch.allclose(single['emotions'],
+                              model.emotion_classifier(features), atol=1e-6)
+
+        # Embeddings come out of the same pass, skipped modalities are zero
+        embedded = model(text_inputs, video_frames, audio_features,
+                         skip_text=skip_text, skip_video=skip_video,
+                         return_embeddings=True)
+        assert torch.equal(embedded['emotions'], gated['emotions'])
+        assert embedded['fused_features'].shape == (batch_size, 256)
+        assert embedded['text_features'].shape == (batch_size, 128)
+        assert not embedded['text_features'][1].any()
+        assert not embedded['video_features'][0].any()
+
+
+if __name__ == "__main__":
+    test_motion_score()
+    test_gated_forward_matches_per_sample()
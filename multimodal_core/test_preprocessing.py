@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import cv2
+import numpy as np
+import pytest
+import torch
+
+try:
+    from multimodal_core.preprocessing import load_video_frames, extract_audio_features
+    from multimodal_core.reference_preprocessing import (
+        reference_load_video_frames, reference_extract_audio_features)
+    from multimodal_core.runtime import find_ffmpeg
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import load_video_frames, extract_audio_features
+    from multimodal_core.reference_preprocessing import (
+        reference_load_video_frames, reference_extract_audio_features)
+    from multimodal_core.runtime import find_ffmpeg
+
+# The clip builder shared with the benchmarks
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from synthetic_media import make_clip
+
+
+def tone_clip(output_dir, num_frames):
+    # Test pattern with a 440 Hz tone, 25 fps
+    return make_clip(output_dir, num_frames / 25, 320, 240, 25, "tone")
+
+
+def test_preprocessing_matches_reference():
+    if find_ffmpeg() is None:
+        pytest.skip("ffmpeg not found")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # One clip longer than 30 frames, one short clip that needs padding
+        for num_frames in (40, 12):
+            path = tone_clip(temp_dir, num_frames)
+
+            frames = load_video_frames(path)
+            assert frames.shape == (30, 3, 224, 224)
+            assert frames.dtype == torch.float32
+            assert torch.equal(frames, reference_load_video_frames(path))
+
+            audio = extract_audio_features(path)
+            assert audio.shape == (1, 64, 300)
+            assert torch.equal(audio, reference_extract_audio_features(path))
+
+
+def test_video_profiles_sample_expected_frames():
+    if find_ffmpeg() is None:
+        pytest.skip("ffmpeg not found")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = tone_clip(temp_dir, 40)
+
+        cap = cv2.VideoCapture(path)
+        decoded = []
+        ret, frame = cap.read()
+        while ret:
+            decoded.append(frame)
+            ret, frame = cap.read()
+        cap.release()
+
+        def expected(indices, size):
+            return torch.from_numpy(np.stack([
+                (cv2.resize(decoded[i], (size, size)) / 255.0).astype(np.float32)
+                for i in indices])).permute(0, 3, 1, 2)
+
+        # Every 4th frame, runs past the end of the clip and is zero padded
+        frames = load_video_frames(path, num_frames=12, size=112, stride=4)
+        assert torch.equal(frames[:10], expected(range(0, 40, 4), 112))
+        assert not frames[10:].any()
+
+        # Spread over the whole clip, first and last frame included
+        frames = load_video_frames(path, num_frames=8, size=112, stride=0)
+        indices = [round(i * 39 / 7) for i in range(8)]
+        assert indices[0] == 0 and indices[-1] == 39
+        assert torch.equal(frames, expected(indices, 112))
+
+
+def test_invalid_frame_sampling_is_rejected():
+    # Checked before the video is opened
+    for num_frames, stride in ((1, 0), (0, 1), (8, -1)):
+        try:
+            load_video_frames("missing.mp4", num_frames=num_frames, stride=stride)
+        except ValueError as e:
+            assert "frame" in str(e) or "stride" in str(e)
+        else:
+            raise AssertionError(f"num_frames={num_frames}, stride={stride} accepted")
+
+
+if __name__ == "__main__":
+    test_preprocessing_matches_reference()
+    test_video_profiles_sample_expected_frames()
+    test_invalid_frame_sampling_is_rejected()
@@ -0,0 +1,53 @@
+import os
+import stat
+import sys
+import tempfile
+
+try:
+    from multimodal_core import runtime
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core import runtime
+
+
+def test_ffmpeg_binary_override():
+    with tempfile.TemporaryDirectory() as tmp:
+        fake = os.path.join(tmp, "ffmpeg")
+        with open(fake, "w") as f:
+            f.write("#!/bin/sh\necho 'ffmpeg version test'\n")
+        os.chmod(fake, os.stat(fake).st_mode | stat.S_IEXEC)
+
+        os.environ["FFMPEG_BINARY"] = fake
+        try:
+            assert runtime.preflight_ffmpeg() == fake
+            assert runtime.ffmpeg_binary() == fake
+        finally:
+            del os.environ["FFMPEG_BINARY"]
+            runtime._ffmpeg_binary = None
+
+
+def test_missing_ffmpeg_fails_fast():
+    os.environ["FFMPEG_BINARY"] = "/nonexistent/ffmpeg"
+    try:
+        runtime.preflight_ffmpeg()
+        assert False, "expected RuntimeError"
+    except RuntimeError as e:
+        assert "FFmpeg not found" in str(e)
+    finally:
+        del os.environ["FFMPEG_BINARY"]
+
+
+def test_phase_timer():
+    timer = runtime.PhaseTimer()
+    timer.record("imports", 1.5)
+    with timer.phase("model load"):
+        pass
+
+    assert list(timer.phases) == ["imports", "model load"]
+    assert timer.total() >= 1.5
+
+
+if __name__ == "__main__":
+    test_ffmpeg_binary_override()
+    test_missing_ffmpeg_fails_fast()
+    test_phase_timer()
@@ -0,0 +1,82 @@
+import os
+import sys
+import tempfile
+import torch
+from transformers import BertTokenizerFast
+
+try:
+    from multimodal_core.models import TextEncoder
+    from multimodal_core.text_cache import LRUCache, TextEmbeddingCache, normalize_text
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.models import TextEncoder
+    from multimodal_core.text_cache import LRUCache, TextEmbeddingCache, normalize_text
+
+
+def test_lru_eviction_and_persistence():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cache.json")
+
+        # Pipeline results, saved as JSON
+        cache = LRUCache(max_size=2, path=path, tag="a")
+        cache.put("okay", [{"label": "neutral", "score": 0.9}])
+        cache.put("what", [{"label": "surprise", "score": 0.7}])
+        assert cache.get("okay") is not None
+        cache.put("yeah", [{"label": "joy", "score": 0.6}])
+
+        # "what" was least recently used
+        assert cache.get("what") is None
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+        cache.save()
+
+        restored = LRUCache(max_size=2, path=path, tag="a")
+        assert sorted(restored.entries) == ["okay", "yeah"]
+        assert restored.get("yeah") == [{"label": "joy", "score": 0.6}]
+
+        # Different model, nothing is reused
+        assert len(LRUCache(max_size=2, path=path, tag="b")) == 0
+
+
+def test_cached_embeddings_are_exact():
+    torch.manual_seed(0)
+    text_encoder = TextEncoder(pretrained=False).eval()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        vocab_path = os.path.join(temp_dir, "vocab.txt")
+        with open(vocab_path, "w") as f:
+            f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]",
+                               "okay", "what", "yeah", ".", "?"]))
+        tokenizer = BertTokenizerFast(vocab_file=vocab_path)
+
+        texts = ["Okay.", "What?", "  okay. ", "Yeah."]
+        cache = TextEmbeddingCache(max_size=10)
+        embeddings = cache.encode(text_encoder, tokenizer, texts, torch.device("cpu"))
+
+        # "  okay. " normalizes to the same key as "Okay."
+        assert normalize_text(texts[0]) == normalize_text(texts[2])
+        assert len(cache) == 3
+
+        for text, embedding in zip(texts, embeddings):
+            inputs = tokenizer(text, padding='max_length', truncation=True,
+                               max_length=128, return_tensors='pt')
+            with torch.inference_mode():
+                expected = text_encoder.pool(inputs['input_ids'],
+                                             inputs['attention_mask'])[0]
+            assert torch.allclose(embedding, expected, atol=1e-6)
+
+        hits = cache.stats()['hits']
+        cache.encode(text_encoder, tokenizer, ["what?"], torch.device("cpu"))
+        assert cache.stats()['hits'] == hits + 1
+
+        # Embeddings persist as tensors
+        path = os.path.join(temp_dir, "embeddings.pt")
+        cache.path = path
+        cache.unsaved = 1
+        cache.save()
+        restored = TextEmbeddingCache(max_size=10, path=path)
+        assert torch.equal(restored.get("okay."), cache.get("okay."))
+
+
+if __name__ == "__main__":
+    test_lru_eviction_and_persistence()
+    test_cached_embeddings_are_exact()
@@ -0,0 +1,42 @@
+import torch
+from .lru_cache import LRUCache, normalize_text
+from .preprocessing import tokenize_utterance
+
+
+# BERT pooler outputs [768] keyed on normalized utterance text. BERT is
+# frozen, so a hit skips the tokenizer and the encoder with the same result.
+class TextEmbeddingCache(LRUCache):
+    def write_state(self, state, path):
+        torch.save(state, path)
+
+    def read_state(self, path):
+        return torch.load(path, weights_only=True)
+
+    def encode(self, text_encoder, tokenizer, texts, device):
+        keys = [normalize_text(text) for text in texts]
+        embeddings = [self.get(key) for key in keys]
+
+        # Embed each missing text once, even if it repeats within the batch
+        missing = {}
+        for text, key, embedding in zip(texts, keys, embeddings):
+            if embedding is None and key not in missing:
+                missing[key] = text
+
+        if missing:
+            text_inputs = tokenize_utterance(tokenizer, list(missing.values()))
+            with torch.inference_mode():
+                pooled = text_encoder.pool(
+                    text_inputs['input_ids'].to(device),
+                    text_inputs['attention_mask'].to(device)).cpu()
+
+            computed = {}
+            for key, embedding in zip(missing, pooled):
+                # clone, a row view would keep the whole batch alive
+                computed[key] = embedding.clone()
+                self.put(key, computed[key])
+
+            embeddings = [computed[key] if embedding is None else embedding
+                          for key, embedding in zip(keys, embeddings)]
+
+        # [batch_size, 768]
+        return torch.stack(embeddings).to(device)
@@ -1,8 +1,12 @@
+import time
 from sagemaker.pytorch import PyTorch
 from sagemaker.debugger import TensorBoardOutputConfig
 
 
-def start_training():
+def start_training(run_name=None, use_spot_instances=False):
+    # Checkpoints are kept per run, pass an earlier run_name to continue it
+    run_name = run_name or time.strftime("%Y-%m-%d-%H-%M-%S")
+
     tensorboard_config = TensorBoardOutputConfig(
         s3_output_path="s3://sentiment-analysis-01/tensorboard",
         container_local_output_path="/opt/ml/output/tensorboard"
@@ -11,6 +15,7 @@ def start_training():
     estimator = PyTorch(
         entry_point="train.py",
         source_dir="training",
+        dependencies=["multimodal_core"],
         role="arn:aws:iam::529088287904:role/sentiment-analysis-execution-role",
         framework_version="2.5.1",
         py_version="py311",
@@ -18,9 +23,17 @@ def start_training():
         instance_type="ml.g5.xlarge",
         hyperparameters={
             "batch-size": 32,
-            "epochs": 25
+            "epochs": 25,
+            # Continues from the newest checkpoint when a restarted job finds one
+            "resume": "true"
         },
-        tensorboard_config=tensorboard_config
+        tensorboard_config=tensorboard_config,
+        # /opt/ml/checkpoints is synced here and restored on restart
+        checkpoint_s3_uri=f"s3://sentiment-analysis-01/checkpoints/{run_name}",
+        checkpoint_local_path="/opt/ml/checkpoints",
+        use_spot_instances=use_spot_instances,
+        max_run=24 * 3600,
+        max_wait=48 * 3600 if use_spot_instances else None
     )
 
     # Start training
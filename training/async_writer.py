@@ -0,0 +1,58 @@
+import atexit
+import queue
+import threading
+from torch.utils.tensorboard import SummaryWriter
+
+
+# SummaryWriter that does its file I/O on a background thread. Calls are
+# queued on a bounded queue, a full queue blocks the caller instead of
+# growing without limit. Writes after close() are dropped.
+class AsyncSummaryWriter:
+    def __init__(self, log_dir, max_queue=1000):
+        self.writer = SummaryWriter(log_dir=log_dir)
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+        self.lock = threading.Lock()
+
+        self.thread = threading.Thread(
+            target=self._run, name="tensorboard-writer", daemon=True)
+        self.thread.start()
+
+        # Flush pending events if the training script exits without close()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+
+            method, args = item
+            try:
+                getattr(self.writer, method)(*args)
+            except Exception as e:
+                print(f"TensorBoard write failed: {str(e)}")
+
+        self.writer.close()
+
+    def _put(self, item):
+        # Nothing is queued behind the stop sentinel, the writer thread
+        # would never take it and a full queue would block forever
+        with self.lock:
+            if not self.closed:
+                self.queue.put(item)
+
+    def add_scalar(self, tag, scalar_value, global_step=None):
+        # Values must already be Python numbers, no device tensors
+        self._put(('add_scalar', (tag, scalar_value, global_step)))
+
+    def flush(self):
+        self._put(('flush', ()))
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self.queue.put(None)
+        self.thread.join()
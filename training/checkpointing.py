@@ -0,0 +1,80 @@
+import os
+import glob
+import queue
+import threading
+import torch
+
+
+def _to_cpu(obj):
+    # Snapshot tensors so training can keep updating them while the write runs
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to('cpu', copy=True)
+    if isinstance(obj, dict):
+        return {k: _to_cpu(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+# Writes checkpoints on a background thread. Files are written to a temporary
+# path and renamed, so a preempted job never leaves a truncated checkpoint.
+class CheckpointManager:
+    def __init__(self, checkpoint_dir, keep_last=3, max_pending=2):
+        self.checkpoint_dir = checkpoint_dir
+        self.keep_last = keep_last
+        self.errors = []
+        os.makedirs(checkpoint_dir, exist_ok=True)
+
+        # Bounded, so at most max_pending CPU snapshots are held in memory
+        self.queue = queue.Queue(maxsize=max_pending)
+        self.thread = threading.Thread(
+            target=self._run, name="checkpoint-writer", daemon=True)
+        self.thread.start()
+
+    def checkpoints(self):
+        return sorted(glob.glob(os.path.join(self.checkpoint_dir, "checkpoint_epoch*.pt")))
+
+    def latest(self):
+        checkpoints = self.checkpoints()
+        return checkpoints[-1] if checkpoints else None
+
+    def load(self, path, map_location="cpu"):
+        # Full trainer state includes the numpy and python RNG states
+        return torch.load(path, map_location=map_location, weights_only=False)
+
+    def save_checkpoint(self, state, epoch):
+        path = os.path.join(self.checkpoint_dir, f"checkpoint_epoch{epoch:04d}.pt")
+        self.queue.put((_to_cpu(state), path, True))
+
+    def save_file(self, state, path):
+        self.queue.put((_to_cpu(state), path, False))
+
+    def wait(self):
+        self.queue.join()
+        if self.errors:
+            errors, self.errors = self.errors, []
+            raise RuntimeError(f"Checkpoint write failed: {str(errors[0])}")
+
+    def _run(self):
+        while True:
+            state, path, prune = self.queue.get()
+            try:
+                self._write(state, path, prune)
+            except Exception as e:
+                self.errors.append(e)
+            finally:
+                self.queue.task_done()
+
+    def _write(self, state, path, prune):
+        tmp_path = path + ".tmp"
+        try:
+            torch.save(state, tmp_path)
+            os.replace(tmp_path, path)
+            print(f"Saved checkpoint to {path}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        if prune:
+            for old_path in self.checkpoints()[:-self.keep_last]:
+                os.remove(old_path)
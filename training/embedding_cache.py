@@ -0,0 +1,108 @@
+import os
+import torch
+import torch.distributed as dist
+from torch.utils.data import Dataset, DataLoader
+from tqdm import tqdm
+from meld_dataset import collate_fn, build_dataloaders
+
+
+# Runs the frozen BERT and r3d_18 trunks once over a dataset and stores the
+# pooled embeddings, mel features and labels in a single file
+def precompute_embeddings(model, dataset, cache_path, batch_size=16):
+    if os.path.exists(cache_path):
+        embeddings = torch.load(cache_path, weights_only=True)
+        if embeddings['num_rows'] == len(dataset):
+            print(f"Loaded cached embeddings from {cache_path}")
+            return embeddings
+        print(f"Stale embedding cache at {cache_path}, recomputing...")
+
+    device = next(model.parameters()).device
+    loader = DataLoader(dataset,
+                        batch_size=batch_size,
+                        collate_fn=collate_fn)
+
+    # The trunks are frozen, so embed them in eval mode: no dropout in BERT
+    # and the pretrained BatchNorm statistics in r3d_18.
+    was_training = model.training
+    model.eval()
+
+    text, video, audio = [], [], []
+    emotion_labels, sentiment_labels = [], []
+
+    with torch.inference_mode():
+        for batch in tqdm(loader, desc=f"Embedding {os.path.basename(cache_path)}"):
+            text.append(model.text_encoder.pool(
+                batch['text_inputs']['input_ids'].to(device),
+                batch['text_inputs']['attention_mask'].to(device)
+            ).cpu())
+            video.append(model.video_encoder.extract_features(
+                batch['video_frames'].to(device)).cpu())
+            audio.append(batch['audio_features'])
+            emotion_labels.append(batch['emotion_label'])
+            sentiment_labels.append(batch['sentiment_label'])
+
+    model.train(was_training)
+
+    embeddings = {
+        'num_rows': len(dataset),
+        'text': torch.cat(text),              # [num_samples, 768]
+        'video': torch.cat(video),            # [num_samples, 512]
+        'audio': torch.cat(audio),            # [num_samples, 1, 64, 300]
+        'emotion_label': torch.cat(emotion_labels),
+        'sentiment_label': torch.cat(sentiment_labels)
+    }
+
+    os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    torch.save(embeddings, tmp_path)
+    os.replace(tmp_path, cache_path)
+    print(f"Saved {embeddings['text'].size(0):,} embeddings to {cache_path}")
+
+    return embeddings
+
+
+# Same batch layout as MELDDataset, with the BERT pooler output in place of
+# the token ids and the r3d_18 features in place of the raw frames
+class CachedEmbeddingDataset(Dataset):
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def __len__(self):
+        return self.embeddings['emotion_label'].size(0)
+
+    def __getitem__(self, idx):
+        return {
+            'text_inputs': {
+                'pooler_output': self.embeddings['text'][idx]
+            },
+            'video_frames': self.embeddings['video'][idx],
+            'audio_features': self.embeddings['audio'][idx],
+            'emotion_label': self.embeddings['emotion_label'][idx],
+            'sentiment_label': self.embeddings['sentiment_label'][idx]
+        }
+
+
+def prepare_cached_dataloaders(model, train_loader, dev_loader, test_loader,
+                               cache_dir, batch_size=32, distributed=False):
+    # Rank 0 fills the cache, the other ranks wait and load it
+    is_main = not distributed or dist.get_rank() == 0
+
+    datasets = []
+    for split, loader in (('train', train_loader),
+                          ('dev', dev_loader),
+                          ('test', test_loader)):
+        if not is_main:
+            dist.barrier()
+
+        embeddings = precompute_embeddings(
+            model, loader.dataset,
+            os.path.join(cache_dir, f"{split}_embeddings.pt"),
+            batch_size=batch_size)
+
+        if distributed and is_main:
+            dist.barrier()
+
+        datasets.append(CachedEmbeddingDataset(embeddings))
+
+    return build_dataloaders(*datasets, batch_size=batch_size,
+                             distributed=distributed)
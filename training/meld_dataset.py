@@ -1,12 +1,19 @@
 from torch.utils.data import Dataset, DataLoader
+from torch.utils.data.distributed import DistributedSampler
 import pandas as pd
 from transformers import AutoTokenizer
 import os
-import cv2
-import numpy as np
+import sys
 import torch
-import subprocess
-import torchaudio
+
+try:
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, tokenize_utterance)
+except ImportError:
+    # Source checkout, the shared package sits next to training/
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.preprocessing import (
+        load_video_frames, extract_audio_features, tokenize_utterance)
 
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
@@ -26,91 +33,11 @@ class MELDDataset(Dataset):
         return len(self.data)
     
     def _load_video_frames(self, video_path):
-        cap = cv2.VideoCapture(video_path)
-        frames = []
-
-        try:
-            if not cap.isOpened():
-                raise ValueError(f"Video not found: {video_path}")
-
-            ret, frame = cap.read()
-            if not ret or frame is None:
-                raise ValueError(f"Video not found: {video_path}")
-            
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            while len(frames) < 30 and cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-
-                frame = cv2.resize(frame, (224, 224))
-                frame = frame / 255.0
-                frames.append(frame)
-            
-        except Exception as e:
-            raise ValueError(f"Video error: {str(e)}")
-        finally:
-            cap.release()
-
-        if (len(frames) == 0):
-            raise ValueError("No frames could be extracted")
-
-        # Pad or truncate frames
-        if len(frames) < 30:
-            frames += [np.zeros_like(frames[0])] * (30 - len(frames))
-        else:
-            frames = frames[:30]
-
-        return torch.FloatTensor(np.array(frames)).permute(0, 3, 1, 2)
+        return load_video_frames(video_path)
 
     def _extract_audio_features(self, video_path):
-        audio_path = video_path.replace('.mp4', '.wav')
+        return extract_audio_features(video_path)
 
-        try:
-            subprocess.run([
-                'ffmpeg',
-                '-i', video_path,
-                '-vn',
-                '-acodec', 'pcm_s16le',
-                '-ar', '16000',
-                '-ac', '1',
-                audio_path
-            ], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-
-            waveform, sample_rate = torchaudio.load(audio_path)
-
-            if sample_rate != 16000:
-                resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                waveform = resampler(waveform)
-
-            mel_spectrogram = torchaudio.transforms.MelSpectrogram(
-                sample_rate=16000,
-                n_mels=64,
-                n_fft=1024,
-                hop_length=512
-            )
-
-            mel_spec = mel_spectrogram(waveform)
-
-            # Normalize
-            mel_spec = (mel_spec - mel_spec.mean()) / mel_spec.std()
-
-            if mel_spec.size(2) < 300:
-                padding = 300 - mel_spec.size(2)
-                mel_spec = torch.nn.functional.pad(mel_spec, (0, padding))
-            else:
-                mel_spec = mel_spec[:, :, :300]
-
-            return mel_spec
-        
-        except subprocess.CalledProcessError as e:
-            raise ValueError(f"Audio extraction error: {str(e)}")
-        except Exception as e:
-            raise ValueError(f"Audio error: {str(e)}")
-        finally:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-    
     def __getitem__(self, idx):
         if isinstance(idx, torch.Tensor):
             idx = idx.item()
@@ -125,11 +52,7 @@ class MELDDataset(Dataset):
             if video_path_exists == False:
                 raise FileNotFoundError(f"No video found for filename: {path}")
             
-            text_inputs = self.tokenizer(row['Utterance'],
-                                        padding='max_length',
-                                        truncation=True,
-                                        max_length=128,
-                                        return_tensors='pt')
+            text_inputs = tokenize_utterance(self.tokenizer, row['Utterance'])
 
             video_frames = self._load_video_frames(path)
             audio_features = self._extract_audio_features(path)
@@ -156,22 +79,36 @@ def collate_fn(batch):
 
 def prepare_dataloaders(train_csv, train_video_dir,
                         dev_csv, dev_video_dir,
-                        test_csv, test_video_dir, batch_size=32):
+                        test_csv, test_video_dir, batch_size=32,
+                        distributed=False):
     train_dataset = MELDDataset(train_csv, train_video_dir)
     dev_dataset = MELDDataset(dev_csv, dev_video_dir)
     test_dataset = MELDDataset(test_csv, test_video_dir)
 
+    return build_dataloaders(train_dataset, dev_dataset, test_dataset,
+                             batch_size=batch_size, distributed=distributed)
+
+def build_dataloaders(train_dataset, dev_dataset, test_dataset,
+                      batch_size=32, distributed=False):
+    # Each rank sees its own shard, shuffling moves to the sampler
+    train_sampler = DistributedSampler(train_dataset, shuffle=True) if distributed else None
+    dev_sampler = DistributedSampler(dev_dataset, shuffle=False) if distributed else None
+    test_sampler = DistributedSampler(test_dataset, shuffle=False) if distributed else None
+
     train_loader = DataLoader(train_dataset,
                               batch_size=batch_size,
-                              shuffle=True,
+                              shuffle=train_sampler is None,
+                              sampler=train_sampler,
                               collate_fn=collate_fn)
 
     dev_loader = DataLoader(dev_dataset,
                             batch_size=batch_size,
+                            sampler=dev_sampler,
                             collate_fn=collate_fn)
 
     test_loader = DataLoader(test_dataset,
                              batch_size=batch_size,
+                             sampler=test_sampler,
                              collate_fn=collate_fn)
 
     return train_loader, dev_loader, test_loader
@@ -1,140 +1,25 @@
 import torch.nn as nn
-from transformers import BertModel
-from torchvision import models as vision_models
 import torch
 from meld_dataset import MELDDataset
 from datetime import datetime
-from sklearn.metrics import precision_score, accuracy_score
-from torch.utils.tensorboard import SummaryWriter
+from async_writer import AsyncSummaryWriter
+from torch.nn.parallel import DistributedDataParallel
+import torch.distributed as dist
+import contextlib
+import random
+import numpy as np
 import os
+import sys
 
+try:
+    from multimodal_core.models import (
+        TextEncoder, VideoEncoder, AudioEncoder, MultimodalSentimentModel)
+except ImportError:
+    # Source checkout, the shared package sits next to training/
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.models import (
+        TextEncoder, VideoEncoder, AudioEncoder, MultimodalSentimentModel)
 
-class TextEncoder(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.bert = BertModel.from_pretrained('bert-base-uncased')
-
-        for param in self.bert.parameters():
-            param.requires_grad = False
-
-        self.projection = nn.Linear(768, 128)
-
-    def forward(self, input_ids, attention_mask):
-        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
-        pooler_output = outputs.pooler_output
-
-        return self.projection(pooler_output)
-
-
-class VideoEncoder(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.backbone = vision_models.video.r3d_18(pretrained=True)
-
-        for param in self.backbone.parameters():
-            param.requires_grad = False
-
-        num_fts = self.backbone.fc.in_features
-        self.backbone.fc = nn.Sequential(
-            nn.Linear(num_fts, 128),
-            nn.ReLU(),
-            nn.Dropout(0.2)
-        )
-
-    def forward(self, x):
-        # [batch_size, frames, channels, height, width]->[batch_size, channels, frames, height, width]
-        x = x.transpose(1, 2)
-        return self.backbone(x)
-
-
-class AudioEncoder(nn.Module):
-    def __init__(self):
-        super().__init__()
-        self.conv_layers = nn.Sequential(
-            # Lower level features
-            nn.Conv1d(64, 64, kernel_size=3),
-            nn.BatchNorm1d(64),
-            nn.ReLU(),
-            nn.MaxPool1d(2),
-            # Higher level features
-            nn.Conv1d(64, 128, kernel_size=3),
-            nn.BatchNorm1d(128),
-            nn.ReLU(),
-            nn.AdaptiveAvgPool1d(1)
-        )
-
-        for param in self.conv_layers.parameters():
-            param.requires_grad = False
-
-        self.projection = nn.Sequential(
-            nn.Linear(128, 128),
-            nn.ReLU(),
-            nn.Dropout(0.2)
-        )
-
-    def forward(self, x):
-        x = x.squeeze(1)
-
-        features = self.conv_layers(x)
-        # Features output: [batch_size, 128, 1]
-
-        return self.projection(features.squeeze(-1))
-
-
-class MultimodalSentimentModel(nn.Module):
-    def __init__(self):
-        super().__init__()
-
-        # Encoders
-        self.text_encoder = TextEncoder()
-        self.video_encoder = VideoEncoder()
-        self.audio_encoder = AudioEncoder()
-
-        # Fusion layer
-        self.fusion_layer = nn.Sequential(
-            nn.Linear(128 * 3, 256),
-            nn.BatchNorm1d(256),
-            nn.ReLU(),
-            nn.Dropout(0.3)
-        )
-
-        # Classification heads
-        self.emotion_classifier = nn.Sequential(
-            nn.Linear(256, 64),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(64, 7)  
-        )
-
-        self.sentiment_classifier = nn.Sequential(
-            nn.Linear(256, 64),
-            nn.ReLU(),
-            nn.Dropout(0.2),
-            nn.Linear(64, 3)  
-        )
-
-    def forward(self, text_inputs, video_frames, audio_features):
-        text_features = self.text_encoder(
-            text_inputs['input_ids'],
-            text_inputs['attention_mask'],
-        )
-        video_features = self.video_encoder(video_frames)
-        audio_features = self.audio_encoder(audio_features)
-        combined_features = torch.cat([
-            text_features,
-            video_features,
-            audio_features
-        ], dim=1) 
-
-        fused_features = self.fusion_layer(combined_features)
-
-        emotion_output = self.emotion_classifier(fused_features)
-        sentiment_output = self.sentiment_classifier(fused_features)
-
-        return {
-            'emotions': emotion_output,
-            'sentiments': sentiment_output
-        }
 
 def compute_class_weights(dataset):
     emotion_counts = torch.zeros(7)
@@ -181,12 +66,52 @@ def compute_class_weights(dataset):
 
     return emotion_weights, sentiment_weights
 
+def confusion_matrix_metrics(confusion):
+    # confusion[true, predicted] counts. Support-weighted precision, recall and
+    # F1 like sklearn's average='weighted', with zero_division=0
+    confusion = confusion.double()
+    true_positives = confusion.diagonal()
+    support = confusion.sum(dim=1)
+    predicted = confusion.sum(dim=0)
+    total = support.sum().clamp(min=1)
+
+    precision = torch.where(predicted > 0, true_positives / predicted.clamp(min=1), 0.0)
+    recall = torch.where(support > 0, true_positives / support.clamp(min=1), 0.0)
+    f1 = torch.where(precision + recall > 0,
+                     2 * precision * recall / (precision + recall).clamp(min=1e-12), 0.0)
+    weights = support / total
+
+    return {
+        'precision': (precision * weights).sum().item(),
+        'recall': (recall * weights).sum().item(),
+        'f1': (f1 * weights).sum().item(),
+        'accuracy': (true_positives.sum() / total).item()
+    }
+
+NUM_EMOTIONS = 7
+NUM_SENTIMENTS = 3
+
+LOSS_KEYS = ('total', 'emotion', 'sentiment')
+
+AUTOCAST_DTYPES = {
+    'fp32': None,
+    'bf16': torch.bfloat16,
+    'fp16': torch.float16
+}
+
+
 class MultimodalTrainer:
-    def __init__(self, model, train_loader, val_loader):
+    def __init__(self, model, train_loader, val_loader,
+                 precision="fp32", channels_last=False, accumulation_steps=1,
+                 distributed=False, log_every=10):
         self.model = model
         self.train_loader = train_loader
         self.val_loader = val_loader
 
+        # Data-parallel training, expects the process group to be initialized
+        self.distributed = distributed
+        self.is_main = not distributed or dist.get_rank() == 0
+
         # Log dataset sized
         train_size = len(train_loader.dataset)
         val_size = len(val_loader.dataset)
@@ -195,12 +120,32 @@ class MultimodalTrainer:
         print(f"Validation samples: {val_size:,}")
         print(f"Batches per epoch: {len(train_loader):,}")
 
+        # Gradient accumulation, one optimizer step every accumulation_steps batches
+        if accumulation_steps < 1:
+            raise ValueError("accumulation_steps must be at least 1")
+        self.accumulation_steps = accumulation_steps
+        print(f"Gradient accumulation steps: {accumulation_steps}")
+        print(f"Effective batch size: {train_loader.batch_size * accumulation_steps}")
+
+        if log_every < 1:
+            raise ValueError("log_every must be at least 1")
+
         timestamp = datetime.now().strftime('%b%d_%H-%M-%S')  # Dec17_14-22-35
         base_dir = '/opt/ml/output/tensorboard' if 'SM_MODEL_DIR' in os.environ else 'runs'
         log_dir = f"{base_dir}/run_{timestamp}"
-        self.writer = SummaryWriter(log_dir=log_dir)
+        self.writer = AsyncSummaryWriter(log_dir=log_dir) if self.is_main else None
         self.global_step = 0
 
+        # Train losses stay on the device and are synced and logged every log_every steps
+        self.log_every = log_every
+
+        device = next(model.parameters()).device
+        if distributed:
+            if device.type == "cuda":
+                model.fusion_layer = nn.SyncBatchNorm.convert_sync_batchnorm(
+                    model.fusion_layer)
+            else:
+                print("SyncBatchNorm requires GPU tensors, keeping per-process BatchNorm in the fusion layer")
 
         self.optimizer = torch.optim.Adam([
             {'params': model.text_encoder.parameters(), 'lr': 8e-6},
@@ -213,6 +158,21 @@ class MultimodalTrainer:
 
         self.current_train_losses = None
 
+        # Mixed precision: autocast to bf16/fp16, loss scaling only needed for fp16
+        if precision not in AUTOCAST_DTYPES:
+            raise ValueError(f"Unsupported precision: {precision}")
+        self.precision = precision
+        self.autocast_dtype = AUTOCAST_DTYPES[precision]
+        self.scaler = torch.amp.GradScaler(
+            device.type, enabled=precision == "fp16")
+
+        if channels_last:
+            model.video_encoder.to_channels_last()
+
+        if distributed:
+            self.model = DistributedDataParallel(
+                model, device_ids=[device.index] if device.type == "cuda" else None)
+
         self.scheduler = torch.optim.lr_scheduler.ReduceLROnPlateau(
             self.optimizer,
             mode="min",
@@ -221,9 +181,19 @@ class MultimodalTrainer:
         )
 
         print("\nCalculating class weights...")
-        emotion_weights, sentiment_weights = compute_class_weights(
-            train_loader.dataset)
-        device = next(model.parameters()).device
+        if distributed:
+            # Count on rank 0 only and share the weights with the other ranks
+            if self.is_main:
+                emotion_weights, sentiment_weights = compute_class_weights(
+                    train_loader.dataset)
+            else:
+                emotion_weights, sentiment_weights = torch.zeros(7), torch.zeros(3)
+            weights = torch.cat([emotion_weights, sentiment_weights]).to(device)
+            dist.broadcast(weights, src=0)
+            emotion_weights, sentiment_weights = weights[:7], weights[7:]
+        else:
+            emotion_weights, sentiment_weights = compute_class_weights(
+                train_loader.dataset)
         self.emotion_weights = emotion_weights.to(device)
         self.sentiment_weights = sentiment_weights.to(device)
 
@@ -241,8 +211,19 @@ class MultimodalTrainer:
         )
 
     def log_metrics(self, losses, metrics=None, phase="train"):
+        # Only rank 0 writes TensorBoard logs
+        if self.writer is None:
+            return
+
         if phase == "train":
             self.current_train_losses = losses
+
+            self.writer.add_scalar(
+                'loss/total/train_step', losses['total'], self.global_step)
+            self.writer.add_scalar(
+                'loss/emotion/train_step', losses['emotion'], self.global_step)
+            self.writer.add_scalar(
+                'loss/sentiment/train_step', losses['sentiment'], self.global_step)
         else:  # Validation phase
             self.writer.add_scalar(
                 'loss/total/train', self.current_train_losses['total'], self.global_step)
@@ -260,135 +241,243 @@ class MultimodalTrainer:
                 'loss/sentiment/val', losses['sentiment'], self.global_step)
 
         if metrics:
-            self.writer.add_scalar(
-                f'{phase}/emotion_precision', metrics['emotion_precision'], self.global_step)
-            self.writer.add_scalar(
-                f'{phase}/emotion_accuracy', metrics['emotion_accuracy'], self.global_step)
-            self.writer.add_scalar(
-                f'{phase}/sentiment_precision', metrics['sentiment_precision'], self.global_step)
-            self.writer.add_scalar(
-                f'{phase}/sentiment_accuracy', metrics['sentiment_accuracy'], self.global_step)
-
-    def train_epoch(self):
-        self.model.train()
-        running_loss = {'total': 0, 'emotion': 0, 'sentiment': 0}
+            for name, value in metrics.items():
+                self.writer.add_scalar(
+                    f'{phase}/{name}', value, self.global_step)
 
-        for batch in self.train_loader:
-            device = next(self.model.parameters()).device
-            text_inputs = {
-                'input_ids': batch['text_inputs']['input_ids'].to(device),
-                'attention_mask': batch['text_inputs']['attention_mask'].to(device)
+    def state_dict(self):
+        model = getattr(self.model, 'module', self.model)
+        return {
+            'model': model.state_dict(),
+            'optimizer': self.optimizer.state_dict(),
+            'scheduler': self.scheduler.state_dict(),
+            'scaler': self.scaler.state_dict(),
+            'global_step': self.global_step,
+            'rng': {
+                'torch': torch.get_rng_state(),
+                'cuda': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else [],
+                'numpy': np.random.get_state(),
+                'python': random.getstate()
             }
-            video_frames = batch['video_frames'].to(device)
-            audio_features = batch['audio_features'].to(device)
-            emotion_labels = batch['emotion_label'].to(device)
-            sentiment_labels = batch['sentiment_label'].to(device)
+        }
 
-            # Zero gradient
-            self.optimizer.zero_grad()
+    def load_state_dict(self, state):
+        model = getattr(self.model, 'module', self.model)
+        model.load_state_dict(state['model'])
+        self.optimizer.load_state_dict(state['optimizer'])
+        self.scheduler.load_state_dict(state['scheduler'])
+        self.scaler.load_state_dict(state['scaler'])
+        self.global_step = state['global_step']
+
+        torch.set_rng_state(state['rng']['torch'])
+        if torch.cuda.is_available() and state['rng']['cuda']:
+            torch.cuda.set_rng_state_all(state['rng']['cuda'])
+        np.random.set_state(state['rng']['numpy'])
+        random.setstate(state['rng']['python'])
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def autocast(self, device):
+        return torch.autocast(device_type=device.type,
+                              dtype=self.autocast_dtype,
+                              enabled=self.autocast_dtype is not None)
+
+    def move_batch(self, batch, device):
+        text_inputs = {k: v.to(device)
+                       for k, v in batch['text_inputs'].items()}
+        video_frames = batch['video_frames'].to(device)
+        audio_features = batch['audio_features'].to(device)
+        emotion_labels = batch['emotion_label'].to(device)
+        sentiment_labels = batch['sentiment_label'].to(device)
+
+        return text_inputs, video_frames, audio_features, emotion_labels, sentiment_labels
+
+    def check_numerics(self, data_loader, max_batches=1):
+        # Compare the mixed-precision forward pass against fp32
+        self.model.eval()
+        max_diff = 0.0
+        agree = {'emotions': 0, 'sentiments': 0}
+        total = 0
+
+        with torch.inference_mode():
+            for i, batch in enumerate(data_loader):
+                if i >= max_batches:
+                    break
+                device = next(self.model.parameters()).device
+                text_inputs, video_frames, audio_features, _, _ = self.move_batch(
+                    batch, device)
+
+                reference = self.model(text_inputs, video_frames, audio_features)
+                with self.autocast(device):
+                    mixed = self.model(text_inputs, video_frames, audio_features)
+
+                for key in agree:
+                    diff = (mixed[key].float() - reference[key]).abs().max()
+                    max_diff = max(max_diff, diff.item())
+                    agree[key] += (mixed[key].argmax(dim=1) ==
+                                   reference[key].argmax(dim=1)).sum().item()
+                total += video_frames.size(0)
+
+        numerics = {
+            'max_abs_logit_diff': max_diff,
+            'emotion_top1_agreement': agree['emotions'] / max(total, 1),
+            'sentiment_top1_agreement': agree['sentiments'] / max(total, 1)
+        }
+        print(f"Numerics check ({self.precision} vs fp32): {numerics}")
+        return numerics
 
-            # Forward pass
-            outputs = self.model(text_inputs, video_frames, audio_features)
+    def train_epoch(self):
+        self.model.train()
+        device = next(self.model.parameters()).device
+        num_batches = len(self.train_loader)
+
+        # [total, emotion, sentiment] accumulated on the device, no per-step syncs
+        running_loss = torch.zeros(3, dtype=torch.float64, device=device)
+        step_loss = torch.zeros(3, dtype=torch.float64, device=device)
+        log_loss = torch.zeros(3, dtype=torch.float64, device=device)
+        log_steps = 0
+
+        # Zero gradient
+        self.optimizer.zero_grad()
+
+        for i, batch in enumerate(self.train_loader):
+            text_inputs, video_frames, audio_features, emotion_labels, sentiment_labels = self.move_batch(
+                batch, device)
+
+            # Micro-batches in this optimizer step, the last step of an epoch may be shorter
+            step_start = i - i % self.accumulation_steps
+            micro_batches = min(self.accumulation_steps,
+                                num_batches - step_start)
+
+            # Only all-reduce gradients on the last micro-batch of a step
+            sync_gradients = i + 1 - step_start >= micro_batches
+            if self.distributed and not sync_gradients:
+                sync_context = self.model.no_sync()
+            else:
+                sync_context = contextlib.nullcontext()
+
+            with sync_context:
+                with self.autocast(device):
+                    # Forward pass
+                    outputs = self.model(
+                        text_inputs, video_frames, audio_features)
+
+                    # Calculate losses using raw logits
+                    emotion_loss = self.emotion_criterion(
+                        outputs["emotions"], emotion_labels)
+                    sentiment_loss = self.sentiment_criterion(
+                        outputs["sentiments"], sentiment_labels)
+                    total_loss = emotion_loss + sentiment_loss
+
+                # Backward pass. Accumulate the gradients of the step mean loss
+                self.scaler.scale(total_loss / micro_batches).backward()
 
-            # Calculate losses using raw logits
-            emotion_loss = self.emotion_criterion(
-                outputs["emotions"], emotion_labels)
-            sentiment_loss = self.sentiment_criterion(
-                outputs["sentiments"], sentiment_labels)
-            total_loss = emotion_loss + sentiment_loss
+            # Track losses
+            losses = torch.stack(
+                [total_loss, emotion_loss, sentiment_loss]).detach().double()
+            running_loss += losses
+            step_loss += losses / micro_batches
 
-            # Backward pass. Calculate gradients
-            total_loss.backward()
+            if not sync_gradients:
+                continue
 
-            # Gradient clipping
+            # Gradient clipping on the unscaled, fully accumulated gradients
+            self.scaler.unscale_(self.optimizer)
             torch.nn.utils.clip_grad_norm_(
                 self.model.parameters(), max_norm=1.0)
 
-            self.optimizer.step()
+            self.scaler.step(self.optimizer)
+            self.scaler.update()
+            self.optimizer.zero_grad()
 
-            # Track losses
-            running_loss['total'] += total_loss.item()
-            running_loss['emotion'] += emotion_loss.item()
-            running_loss['sentiment'] += sentiment_loss.item()
+            log_loss += step_loss
+            log_steps += 1
+            step_loss.zero_()
 
-            self.log_metrics({
-                'total': total_loss.item(),
-                'emotion': emotion_loss.item(),
-                'sentiment': sentiment_loss.item()
-            })
+            # One host sync per log interval, and for the tail of the epoch
+            if log_steps == self.log_every or i + 1 == num_batches:
+                self.log_metrics(
+                    dict(zip(LOSS_KEYS, (log_loss / log_steps).tolist())))
+                log_loss.zero_()
+                log_steps = 0
 
             self.global_step += 1
 
-        return {k: v/len(self.train_loader) for k, v in running_loss.items()}
-    
+        if self.distributed:
+            # Average the epoch losses over every rank
+            totals = torch.cat([running_loss, torch.tensor(
+                [num_batches], dtype=torch.float64, device=device)])
+            dist.all_reduce(totals)
+            running_loss, num_batches = totals[:3], totals[3]
+
+        return dict(zip(LOSS_KEYS, (running_loss / num_batches).tolist()))
+
     def evaluate(self, data_loader, phase="val"):
         self.model.eval()
-        loss = {'total': 0, 'emotion': 0, 'sentiment': 0}
-        all_emotion_preds = []
-        all_emotion_labels = []
-        all_sentiment_preds = []
-        all_sentiment_labels = []
+        device = next(self.model.parameters()).device
 
         with torch.inference_mode():
+            # Accumulated on the device, no host syncs inside the loop
+            loss = torch.zeros(3, dtype=torch.float64, device=device)
+            emotion_confusion = torch.zeros(
+                NUM_EMOTIONS * NUM_EMOTIONS, dtype=torch.long, device=device)
+            sentiment_confusion = torch.zeros(
+                NUM_SENTIMENTS * NUM_SENTIMENTS, dtype=torch.long, device=device)
+
             for batch in data_loader:
-                device = next(self.model.parameters()).device
-                text_inputs = {
-                    'input_ids': batch['text_inputs']['input_ids'].to(device),
-                    'attention_mask': batch['text_inputs']['attention_mask'].to(device)
-                }
-                video_frames = batch['video_frames'].to(device)
-                audio_features = batch['audio_features'].to(device)
-                emotion_labels = batch['emotion_label'].to(device)
-                sentiment_labels = batch['sentiment_label'].to(device)
-                outputs = self.model(text_inputs, video_frames, audio_features)
-
-                # Calculate losses using raw logits
-                emotion_loss = self.emotion_criterion(
-                    outputs["emotions"], emotion_labels)
-                sentiment_loss = self.sentiment_criterion(
-                    outputs["sentiments"], sentiment_labels)
-                total_loss = emotion_loss + sentiment_loss
-
-                all_emotion_preds.extend(
-                    outputs["emotions"].argmax(dim=1).cpu().numpy())
-                all_emotion_labels.extend(emotion_labels.cpu().numpy())
-                all_sentiment_preds.extend(
-                    outputs["sentiments"].argmax(dim=1).cpu().numpy())
-                all_sentiment_labels.extend(sentiment_labels.cpu().numpy())
+                text_inputs, video_frames, audio_features, emotion_labels, sentiment_labels = self.move_batch(
+                    batch, device)
+
+                with self.autocast(device):
+                    outputs = self.model(
+                        text_inputs, video_frames, audio_features)
+
+                    # Calculate losses using raw logits
+                    emotion_loss = self.emotion_criterion(
+                        outputs["emotions"], emotion_labels)
+                    sentiment_loss = self.sentiment_criterion(
+                        outputs["sentiments"], sentiment_labels)
+                    total_loss = emotion_loss + sentiment_loss
+
+                # Confusion counts, flattened [true, predicted]
+                emotion_confusion += torch.bincount(
+                    emotion_labels * NUM_EMOTIONS + outputs["emotions"].argmax(dim=1),
+                    minlength=NUM_EMOTIONS * NUM_EMOTIONS)
+                sentiment_confusion += torch.bincount(
+                    sentiment_labels * NUM_SENTIMENTS + outputs["sentiments"].argmax(dim=1),
+                    minlength=NUM_SENTIMENTS * NUM_SENTIMENTS)
 
                 # Track losses
-                loss['total'] += total_loss.item()
-                loss['emotion'] += emotion_loss.item()
-                loss['sentiment'] += sentiment_loss.item()
-            
-        avg_loss = {k: v/len(data_loader) for k, v in loss.items()}
-
-        # Compute the precision and accuracy
-        emotion_precision = precision_score(
-            all_emotion_labels, all_emotion_preds, average='weighted')
-        emotion_accuracy = accuracy_score(
-            all_emotion_labels, all_emotion_preds)
-        sentiment_precision = precision_score(
-            all_sentiment_labels, all_sentiment_preds, average='weighted')
-        sentiment_accuracy = accuracy_score(
-            all_sentiment_labels, all_sentiment_preds)
-
-        self.log_metrics(avg_loss, {
-            'emotion_precision': emotion_precision,
-            'emotion_accuracy': emotion_accuracy,
-            'sentiment_precision': sentiment_precision,
-            'sentiment_accuracy': sentiment_accuracy
-        }, phase=phase)
+                loss += torch.stack(
+                    [total_loss, emotion_loss, sentiment_loss]).double()
+
+            num_batches = torch.tensor(
+                [len(data_loader)], dtype=torch.float64, device=device)
+
+            if self.distributed:
+                # Sum losses and confusion counts over every rank
+                for tensor in (loss, num_batches, emotion_confusion, sentiment_confusion):
+                    dist.all_reduce(tensor)
+
+            avg_loss = dict(zip(LOSS_KEYS, (loss / num_batches).tolist()))
+            emotion_metrics = confusion_matrix_metrics(
+                emotion_confusion.view(NUM_EMOTIONS, NUM_EMOTIONS))
+            sentiment_metrics = confusion_matrix_metrics(
+                sentiment_confusion.view(NUM_SENTIMENTS, NUM_SENTIMENTS))
+
+        metrics = {}
+        for name in ('precision', 'recall', 'f1', 'accuracy'):
+            metrics[f'emotion_{name}'] = emotion_metrics[name]
+            metrics[f'sentiment_{name}'] = sentiment_metrics[name]
+
+        self.log_metrics(avg_loss, metrics, phase=phase)
 
         if phase == "val":
             self.scheduler.step(avg_loss['total'])
 
-        return avg_loss, {
-            'emotion_precision': emotion_precision,
-            'emotion_accuracy': emotion_accuracy,
-            'sentiment_precision': sentiment_precision,
-            'sentiment_accuracy': sentiment_accuracy
-        }
+        return avg_loss, metrics
 
 
 if __name__ == "__main__":
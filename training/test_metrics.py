@@ -0,0 +1,31 @@
+import torch
+from sklearn.metrics import precision_score, recall_score, f1_score, accuracy_score
+from models import confusion_matrix_metrics
+
+
+def test_confusion_matrix_metrics():
+    generator = torch.Generator().manual_seed(0)
+
+    for num_classes in (7, 3):
+        labels = torch.randint(0, num_classes, (500,), generator=generator)
+        # Leave one class never predicted to exercise zero_division
+        preds = torch.randint(0, num_classes - 1, (500,), generator=generator)
+
+        confusion = torch.bincount(labels * num_classes + preds,
+                                   minlength=num_classes * num_classes)
+        metrics = confusion_matrix_metrics(
+            confusion.view(num_classes, num_classes))
+
+        expected = {
+            'precision': precision_score(labels, preds, average='weighted', zero_division=0),
+            'recall': recall_score(labels, preds, average='weighted', zero_division=0),
+            'f1': f1_score(labels, preds, average='weighted', zero_division=0),
+            'accuracy': accuracy_score(labels, preds)
+        }
+
+        for name, value in expected.items():
+            assert abs(metrics[name] - value) < 1e-9, (name, metrics[name], value)
+
+
+if __name__ == "__main__":
+    test_confusion_matrix_metrics()
@@ -2,13 +2,22 @@ import os
 import argparse
 import json
 import torch
+import torch.distributed as dist
 import torchaudio
+from datetime import timedelta
 from tqdm import tqdm
 from models import MultimodalSentimentModel, MultimodalTrainer
 from meld_dataset import prepare_dataloaders
-from install_ffmpeg import install_ffmpeg
+from embedding_cache import prepare_cached_dataloaders
+from checkpointing import CheckpointManager
 import sys
 
+try:
+    from multimodal_core.runtime import preflight_ffmpeg
+except ImportError:
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from multimodal_core.runtime import preflight_ffmpeg
+
 SM_MODEL_DIR = os.environ.get('SM_MODEL_DIR', ".")
 SM_CHANNEL_TRAINING = os.environ.get(
     'SM_CHANNEL_TRAINING', "/opt/ml/input/data/training")
@@ -16,6 +25,8 @@ SM_CHANNEL_VALIDATION = os.environ.get(
     'SM_CHANNEL_VALIDATION', "/opt/ml/input/data/validation")
 SM_CHANNEL_TEST = os.environ.get(
     'SM_CHANNEL_TEST', "/opt/ml/input/data/test")
+# SageMaker syncs this directory with checkpoint_s3_uri
+SM_CHECKPOINT_DIR = '/opt/ml/checkpoints' if 'SM_MODEL_DIR' in os.environ else 'checkpoints'
 
 os.environ['PYTORCH_CUDA_ALLOC_CONF'] = "expandable_segments:True"
 
@@ -32,20 +43,77 @@ def parse_args():
     parser.add_argument("--test-dir", type=str, default=SM_CHANNEL_TEST)
     parser.add_argument("--model-dir", type=str, default=SM_MODEL_DIR)
 
+    # Precompute the frozen BERT / r3d_18 embeddings once and train the heads on them
+    parser.add_argument("--cache-embeddings", action="store_true")
+    parser.add_argument("--embedding-cache-dir", type=str,
+                        default="/tmp/meld_embeddings")
+
+    # Mixed precision and channels-last memory format for the r3d_18 backbone
+    parser.add_argument("--precision", type=str, default="fp32",
+                        choices=["fp32", "bf16", "fp16"])
+    parser.add_argument("--channels-last", action="store_true")
+
+    # Effective batch size is batch-size * accumulation-steps
+    parser.add_argument("--accumulation-steps", type=int, default=1)
+
+    # Data-parallel training, launch with torchrun --nproc_per_node=N train.py --distributed
+    parser.add_argument("--distributed", action="store_true")
+
+    # Host syncs and TensorBoard train-loss logging every N optimizer steps
+    parser.add_argument("--log-every", type=int, default=10)
+
+    # Full trainer state checkpoints, --resume continues from the latest one
+    parser.add_argument("--checkpoint-dir", type=str, default=SM_CHECKPOINT_DIR)
+    parser.add_argument("--checkpoint-every", type=int, default=1)
+    parser.add_argument("--keep-checkpoints", type=int, default=3)
+    # Also takes a value, SageMaker passes hyperparameters as --resume true
+    parser.add_argument("--resume", nargs="?", const=True, default=False,
+                        type=lambda value: value.lower() in ("true", "1", "yes"))
+
     return parser.parse_args()
 
 
+def setup_distributed():
+    # torchrun provides RANK, LOCAL_RANK and WORLD_SIZE
+    backend = "nccl" if torch.cuda.is_available() else "gloo"
+    # Long timeout, rank 0 may spend a while filling the embedding cache
+    dist.init_process_group(backend=backend, timeout=timedelta(hours=2))
+    local_rank = int(os.environ.get("LOCAL_RANK", 0))
+
+    if torch.cuda.is_available():
+        torch.cuda.set_device(local_rank)
+        device = torch.device("cuda", local_rank)
+    else:
+        # Split the cores between the processes on this node
+        local_world_size = int(os.environ.get(
+            "LOCAL_WORLD_SIZE", dist.get_world_size()))
+        torch.set_num_threads(max(1, os.cpu_count() // local_world_size))
+        device = torch.device("cpu")
+
+    print(f"Rank {dist.get_rank()}/{dist.get_world_size()} using {backend} on {device}")
+    return device, local_rank
+
+
 def main():
-    if not install_ffmpeg():
-        print("Error: FFmpeg installation failed. Cannot continue training.")
+    args = parse_args()
+
+    if args.distributed:
+        device, local_rank = setup_distributed()
+    else:
+        device, local_rank = torch.device(
+            'cuda' if torch.cuda.is_available() else 'cpu'), 0
+    is_main = not args.distributed or dist.get_rank() == 0
+
+    # FFmpeg comes with the training image, check it before any data loads
+    try:
+        preflight_ffmpeg()
+    except RuntimeError as e:
+        print(f"Error: {str(e)}. Cannot continue training.")
         sys.exit(1)
 
     print("Available audio backends:")
     print(str(torchaudio.list_audio_backends()))
 
-    args = parse_args()
-    device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-
     # Track initial GPU memory if available
     if torch.cuda.is_available():
         torch.cuda.reset_peak_memory_stats()
@@ -60,7 +128,8 @@ def main():
         test_csv=os.path.join(args.test_dir, 'test_sent_emo.csv'),
         test_video_dir=os.path.join(
             args.test_dir, 'output_repeated_splits_test'),
-        batch_size=args.batch_size
+        batch_size=args.batch_size,
+        distributed=args.distributed
     )
 
     print(f"""Training DSV path: {os.path.join(
@@ -69,7 +138,23 @@ def main():
           os.path.join(args.train_dir, 'train_splits')}""")
 
     model = MultimodalSentimentModel().to(device)
-    trainer = MultimodalTrainer(model, train_loader, val_loader)
+
+    if args.cache_embeddings:
+        train_loader, val_loader, test_loader = prepare_cached_dataloaders(
+            model, train_loader, val_loader, test_loader,
+            cache_dir=args.embedding_cache_dir,
+            batch_size=args.batch_size,
+            distributed=args.distributed
+        )
+
+    trainer = MultimodalTrainer(model, train_loader, val_loader,
+                                precision=args.precision,
+                                channels_last=args.channels_last,
+                                accumulation_steps=args.accumulation_steps,
+                                distributed=args.distributed,
+                                log_every=args.log_every)
+    if args.precision != "fp32":
+        trainer.check_numerics(val_loader)
     best_val_loss = float('inf')
 
     metrics_data = {
@@ -78,7 +163,24 @@ def main():
         "epochs": []
     }
 
-    for epoch in tqdm(range(args.epochs), desc="Epochs"):
+    checkpoints = CheckpointManager(
+        args.checkpoint_dir, keep_last=args.keep_checkpoints)
+    start_epoch = 0
+
+    if args.resume and checkpoints.latest():
+        checkpoint_path = checkpoints.latest()
+        print(f"Resuming from checkpoint: {checkpoint_path}")
+        checkpoint = checkpoints.load(checkpoint_path)
+        trainer.load_state_dict(checkpoint['trainer'])
+        start_epoch = checkpoint['epoch'] + 1
+        best_val_loss = checkpoint['best_val_loss']
+        metrics_data = checkpoint['metrics_data']
+
+    for epoch in tqdm(range(start_epoch, args.epochs), desc="Epochs",
+                      initial=start_epoch, total=args.epochs, disable=not is_main):
+        if args.distributed:
+            train_loader.sampler.set_epoch(epoch)
+
         train_loss = trainer.train_epoch()
         val_loss, val_metrics = trainer.evaluate(val_loader)
 
@@ -87,6 +189,10 @@ def main():
         metrics_data["val_losses"].append(val_loss["total"])
         metrics_data["epochs"].append(epoch)
 
+        # Losses and metrics are already reduced across ranks
+        if not is_main:
+            continue
+
         # Log metrics in SageMaker format
         print(json.dumps({
             "metrics": [
@@ -108,12 +214,28 @@ def main():
             print(f"Peak GPU memory used: {memory_used:.2f} GB")
         if val_loss["total"] < best_val_loss:
             best_val_loss = val_loss["total"]
-            torch.save(model.state_dict(), os.path.join(
+            checkpoints.save_file(model.state_dict(), os.path.join(
                 args.model_dir, "model.pth"))
 
+        if (epoch + 1) % args.checkpoint_every == 0 or epoch + 1 == args.epochs:
+            checkpoints.save_checkpoint({
+                'trainer': trainer.state_dict(),
+                'epoch': epoch,
+                'best_val_loss': best_val_loss,
+                'metrics_data': metrics_data
+            }, epoch)
+
+    checkpoints.wait()
+
     print("Evaluating on test set...")
     test_loss, test_metrics = trainer.evaluate(test_loader, phase="test")
     metrics_data["test_loss"] = test_loss["total"]
+    trainer.close()
+
+    if args.distributed:
+        dist.destroy_process_group()
+    if not is_main:
+        return
 
     print(json.dumps({
         "metrics": [